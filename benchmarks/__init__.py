@@ -0,0 +1,3 @@
+from .generator import generate_bundle, generate_dishes
+from .run import run_case, run_grid
+from .compare import compare_results
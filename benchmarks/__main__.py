@@ -0,0 +1,150 @@
+import sys
+import json
+import argparse
+
+from .run import GRIDS, run_grid, print_case
+from .compare import DEFAULT_THRESHOLDS, compare_results, has_regressions
+from .compare import print_comparison
+from .generator import generate_bundle
+from .parity import run_checks, print_check
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def _write_json(data, path):
+    output = json.dumps(data, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="排餐性能基准"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行基准并输出 JSON 结果")
+    run_parser.add_argument(
+        "--grid", default="quick", choices=list(GRIDS), help="预设基准网格"
+    )
+    run_parser.add_argument("--dishes", type=_int_list, help="菜品数量，逗号分隔")
+    run_parser.add_argument("--days", type=_int_list, help="配餐天数，逗号分隔")
+    run_parser.add_argument(
+        "--dishes-per-day", type=_int_list, help="每日菜品数量，逗号分隔"
+    )
+    run_parser.add_argument("--repeat", type=int, default=3, help="每组参数的计时次数")
+    run_parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    run_parser.add_argument(
+        "--score-mode", default="vector", choices=["vector", "scalar"], help="评分模式"
+    )
+    run_parser.add_argument(
+        "-o", "--output", help="结果输出文件（JSON），默认输出到标准输出"
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="与基线比较，存在回归时退出码为1"
+    )
+    compare_parser.add_argument("baseline", help="基线结果文件（JSON）")
+    compare_parser.add_argument("current", help="当前结果文件（JSON）")
+    compare_parser.add_argument(
+        "--latency",
+        type=float,
+        default=DEFAULT_THRESHOLDS["latency"],
+        help="延迟相对增幅阈值",
+    )
+    compare_parser.add_argument(
+        "--memory",
+        type=float,
+        default=DEFAULT_THRESHOLDS["memory"],
+        help="峰值内存相对增幅阈值",
+    )
+    compare_parser.add_argument(
+        "--compliance",
+        type=float,
+        default=DEFAULT_THRESHOLDS["compliance"],
+        help="达标率绝对降幅阈值",
+    )
+    compare_parser.add_argument(
+        "--day-growth",
+        type=float,
+        default=DEFAULT_THRESHOLDS["day_growth"],
+        help="每天耗时增长倍数（后10%%天数/前10%%天数）的绝对增幅阈值",
+    )
+
+    generate_parser = subparsers.add_parser(
+        "generate", help="生成合成输入包（可作为 python -m meal_planner_lib 的输入）"
+    )
+    generate_parser.add_argument("--dishes", type=int, default=1000, help="菜品数量")
+    generate_parser.add_argument("--days", type=int, default=30, help="配餐天数")
+    generate_parser.add_argument(
+        "--dishes-per-day", type=int, default=8, help="每日菜品数量"
+    )
+    generate_parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    generate_parser.add_argument(
+        "-o", "--output", help="输出文件（JSON），默认输出到标准输出"
+    )
+
+    check_parser = subparsers.add_parser(
+        "check",
+        help="评分一致性（向量化/逐菜品/原始公式）与断点续排回归检查，不一致时退出码为1",
+    )
+    check_parser.add_argument("--dishes", type=int, default=300, help="菜品数量")
+    check_parser.add_argument("--days", type=int, default=14, help="配餐天数")
+    check_parser.add_argument(
+        "--dishes-per-day", type=int, default=8, help="每日菜品数量"
+    )
+    check_parser.add_argument("--seed", type=int, default=0, help="随机种子")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        grid = dict(GRIDS[args.grid])
+        for key in ["dishes", "days", "dishes_per_day"]:
+            if getattr(args, key):
+                grid[key] = getattr(args, key)
+        results = run_grid(
+            grid,
+            repeat=args.repeat,
+            seed=args.seed,
+            score_mode=args.score_mode,
+            log=print_case,
+        )
+        _write_json(results, args.output)
+    elif args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        rows = compare_results(
+            baseline,
+            current,
+            {
+                "latency": args.latency,
+                "memory": args.memory,
+                "compliance": args.compliance,
+                "day_growth": args.day_growth,
+            },
+        )
+        print_comparison(rows)
+        if has_regressions(rows):
+            sys.exit(1)
+    elif args.command == "check":
+        results = run_checks(
+            args.dishes, args.days, args.dishes_per_day, seed=args.seed, log=print_check
+        )
+        if not all(result["ok"] for result in results.values()):
+            sys.exit(1)
+    else:
+        bundle = generate_bundle(
+            args.dishes, args.days, args.dishes_per_day, seed=args.seed
+        )
+        _write_json([bundle], args.output)
+
+
+if __name__ == "__main__":
+    main()
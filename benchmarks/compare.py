@@ -0,0 +1,167 @@
+import sys
+
+# 默认回归阈值：延迟和峰值内存按相对增幅，达标率按绝对降幅，
+# 每天耗时的增长倍数（后10%天数/前10%天数）按绝对增幅
+DEFAULT_THRESHOLDS = {
+    "latency": 0.2,
+    "memory": 0.2,
+    "compliance": 0.05,
+    "day_growth": 0.3,
+}
+
+# 低于该值的延迟变化视为计时噪声，不判为回归（秒）
+LATENCY_NOISE_FLOOR = 0.005
+
+
+def compare_results(baseline, current, thresholds=None):
+    """
+    比较两次基准结果，按用例名称对齐
+
+    Args:
+        baseline: 基线结果字典（run_grid 的返回值）
+        current: 当前结果字典
+        thresholds: 覆盖 DEFAULT_THRESHOLDS 的阈值
+
+    Returns:
+        比较结果列表，每项包含用例名称、状态（ok / regression / improvement / error /
+        new / missing）、各指标的基线值和当前值、各指标的判定（verdicts）以及回归原因
+        （reasons）和改进说明（improvements）
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    baseline_cases = {case["name"]: case for case in baseline["cases"]}
+    current_cases = {case["name"]: case for case in current["cases"]}
+
+    rows = []
+    for name, case in current_cases.items():
+        base = baseline_cases.get(name)
+        row = {"name": name, "status": "ok", "reasons": [], "improvements": []}
+        if base is None:
+            row["status"] = "new"
+        elif case["error"] and not base["error"]:
+            row["status"] = "error"
+            row["reasons"].append(case["error"])
+        elif not case["error"] and not base["error"]:
+            for metric in ["latency_s", "peak_memory_mb", "compliance_rate"]:
+                row[metric] = {"baseline": base[metric], "current": case[metric]}
+            row["verdicts"] = {}
+            for metric, (verdict, reason) in _metric_verdicts(
+                base, case, thresholds
+            ).items():
+                row["verdicts"][metric] = verdict
+                if verdict == "regression":
+                    row["reasons"].append(reason)
+                elif verdict == "improvement":
+                    row["improvements"].append(reason)
+            # 任一指标回归即判为回归，只有没有指标回归时才判为改进
+            if row["reasons"]:
+                row["status"] = "regression"
+            elif row["improvements"]:
+                row["status"] = "improvement"
+        rows.append(row)
+
+    for name in baseline_cases:
+        if name not in current_cases:
+            rows.append(
+                {"name": name, "status": "missing", "reasons": [], "improvements": []}
+            )
+    return rows
+
+
+def _metric_verdicts(base, case, thresholds):
+    """
+    逐指标判定回归或改进
+
+    Returns:
+        {指标: (ok / regression / improvement, 说明)}，缺少数据的指标不出现
+    """
+    verdicts = {}
+
+    latency_delta = case["latency_s"] - base["latency_s"]
+    verdict = "ok", ""
+    if abs(latency_delta) > LATENCY_NOISE_FLOOR and base["latency_s"] > 0:
+        ratio = latency_delta / base["latency_s"]
+        if ratio > thresholds["latency"]:
+            verdict = "regression", f"延迟增加 {ratio:.1%}"
+        elif ratio < -thresholds["latency"]:
+            verdict = "improvement", f"延迟减少 {-ratio:.1%}"
+    verdicts["latency_s"] = verdict
+
+    if base["peak_memory_mb"] > 0:
+        ratio = case["peak_memory_mb"] / base["peak_memory_mb"] - 1
+        verdict = "ok", ""
+        if ratio > thresholds["memory"]:
+            verdict = "regression", f"峰值内存增加 {ratio:.1%}"
+        elif ratio < -thresholds["memory"]:
+            verdict = "improvement", f"峰值内存减少 {-ratio:.1%}"
+        verdicts["peak_memory_mb"] = verdict
+
+    drop = base["compliance_rate"] - case["compliance_rate"]
+    verdict = "ok", ""
+    if drop > thresholds["compliance"]:
+        verdict = "regression", f"达标率下降 {drop:.1%}"
+    elif drop < -thresholds["compliance"]:
+        verdict = "improvement", f"达标率提高 {-drop:.1%}"
+    verdicts["compliance_rate"] = verdict
+
+    # 旧基线没有逐天耗时时跳过
+    base_growth = (base.get("day_latency") or {}).get("growth")
+    growth = (case.get("day_latency") or {}).get("growth")
+    if base_growth is not None and growth is not None:
+        verdict = "ok", ""
+        delta = growth - base_growth
+        if delta > thresholds["day_growth"]:
+            verdict = (
+                "regression",
+                f"每天耗时增长倍数 {base_growth:.2f} -> {growth:.2f}",
+            )
+        elif delta < -thresholds["day_growth"]:
+            verdict = (
+                "improvement",
+                f"每天耗时增长倍数 {base_growth:.2f} -> {growth:.2f}",
+            )
+        verdicts["day_growth"] = verdict
+    return verdicts
+
+
+def has_regressions(rows):
+    return any(row["status"] in ("regression", "error") for row in rows)
+
+
+def print_comparison(rows):
+    icons = {
+        "ok": "✅",
+        "improvement": "🚀",
+        "regression": "❌",
+        "error": "❌",
+        "new": "🆕",
+        "missing": "⚠️",
+    }
+    for row in rows:
+        line = f"{icons[row['status']]} {row['name']}: {row['status']}"
+        if "latency_s" in row:
+            latency = row["latency_s"]
+            memory = row["peak_memory_mb"]
+            compliance = row["compliance_rate"]
+            line += (
+                f"（延迟 {latency['baseline']:.3f}s -> {latency['current']:.3f}s，"
+                f"峰值内存 {memory['baseline']:.1f} -> {memory['current']:.1f} MB，"
+                f"达标率 {compliance['baseline']:.1%} -> {compliance['current']:.1%}）"
+            )
+        if row["reasons"]:
+            line += "：" + "；".join(row["reasons"])
+        if row["improvements"]:
+            line += "（改进：" + "；".join(row["improvements"]) + "）"
+        print(line, file=sys.stderr)
+
+    # 汇总结论与 has_regressions（即 compare 命令的退出码）保持一致
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    if has_regressions(rows):
+        verdict = "❌ 存在回归"
+    elif counts.get("improvement"):
+        verdict = "🚀 有改进，无回归"
+    else:
+        verdict = "✅ 无回归"
+    summary = "，".join(f"{status} {count}" for status, count in counts.items())
+    print(f"{verdict}（{summary}）", file=sys.stderr)
@@ -0,0 +1,217 @@
+from statistics import NormalDist
+
+import numpy as np
+
+NUTRIENTS = ["能量(Kcal)", "蛋白质(g)", "脂肪(g)", "碳水化合物(g)"]
+MEAL_TIMES = ["早餐", "午餐", "晚餐"]
+
+# 默认类别占比（菜品目录中各类别菜品的比例）
+DEFAULT_CATEGORY_MIX = {"主": 0.15, "荤": 0.35, "素": 0.35, "汤": 0.15}
+
+# 各类别每份菜品的典型宏量营养素中位数（g）和价格中位数（元），按对数正态分布抽样
+CATEGORY_PROFILES = {
+    "主": {
+        "宏量": {"蛋白质(g)": 5.5, "脂肪(g)": 1.5, "碳水化合物(g)": 48},
+        "离散度": 0.25,
+        "价格": 2.0,
+        "餐时段": {"早餐": 0.9, "午餐": 0.95, "晚餐": 0.95},
+    },
+    "荤": {
+        "宏量": {"蛋白质(g)": 16, "脂肪(g)": 13, "碳水化合物(g)": 8},
+        "离散度": 0.35,
+        "价格": 10.0,
+        "餐时段": {"早餐": 0.15, "午餐": 0.95, "晚餐": 0.9},
+    },
+    "素": {
+        "宏量": {"蛋白质(g)": 3.5, "脂肪(g)": 6, "碳水化合物(g)": 11},
+        "离散度": 0.4,
+        "价格": 5.0,
+        "餐时段": {"早餐": 0.5, "午餐": 0.9, "晚餐": 0.9},
+    },
+    "汤": {
+        "宏量": {"蛋白质(g)": 4, "脂肪(g)": 3, "碳水化合物(g)": 6},
+        "离散度": 0.4,
+        "价格": 3.0,
+        "餐时段": {"早餐": 0.4, "午餐": 0.9, "晚餐": 0.9},
+    },
+}
+
+# 每日菜品数量递增时依次加入的槽位（餐时段, 类别）；前 n 项即为每日 n 道菜的餐类配置
+SLOT_ORDER = [
+    ("早餐", "主"),
+    ("午餐", "主"),
+    ("晚餐", "主"),
+    ("午餐", "荤"),
+    ("晚餐", "荤"),
+    ("午餐", "素"),
+    ("晚餐", "素"),
+    ("早餐", "素"),
+    ("午餐", "汤"),
+    ("晚餐", "汤"),
+    ("午餐", "荤"),
+    ("晚餐", "素"),
+    ("早餐", "汤"),
+    ("午餐", "素"),
+    ("晚餐", "荤"),
+    ("早餐", "荤"),
+]
+
+# 能量按 Atwater 系数由宏量营养素计算（kcal/g）
+ATWATER = {"蛋白质(g)": 4, "脂肪(g)": 9, "碳水化合物(g)": 4}
+
+
+def _energy(macros):
+    return sum(macros[n] * factor for n, factor in ATWATER.items())
+
+
+def generate_dishes(n_dishes, category_mix=None, seed=0):
+    """
+    生成合成菜品目录
+
+    各类别菜品的宏量营养素和价格按类别中位数的对数正态分布抽样，能量由宏量营养素按
+    Atwater 系数计算（另加少量噪声），适用餐时段按类别的概率抽样（至少一个）。
+
+    Args:
+        n_dishes: 菜品数量
+        category_mix: 类别占比字典，默认 DEFAULT_CATEGORY_MIX；类别须在 CATEGORY_PROFILES 中
+        seed: 随机种子
+
+    Returns:
+        菜品字典列表
+    """
+    category_mix = category_mix or DEFAULT_CATEGORY_MIX
+    for category in category_mix:
+        if category not in CATEGORY_PROFILES:
+            raise ValueError(
+                f"菜品类别异常：{category}（可选：{'、'.join(CATEGORY_PROFILES)}）"
+            )
+    rng = np.random.default_rng(seed)
+    categories = list(category_mix)
+    weights = np.array([category_mix[c] for c in categories], dtype=float)
+    codes = rng.choice(len(categories), size=n_dishes, p=weights / weights.sum())
+
+    dishes = []
+    for i, code in enumerate(codes.tolist()):
+        category = categories[code]
+        profile = CATEGORY_PROFILES[category]
+        sigma = profile["离散度"]
+        macros = {
+            n: round(float(median * rng.lognormal(0, sigma)), 1)
+            for n, median in profile["宏量"].items()
+        }
+        energy = _energy(macros) * rng.normal(1, 0.03)
+        meal_times = [
+            meal_time for meal_time, p in profile["餐时段"].items() if rng.random() < p
+        ] or [MEAL_TIMES[rng.integers(len(MEAL_TIMES))]]
+        dishes.append(
+            {
+                "菜品ID": f"bench{i:06d}",
+                "最终定价": round(float(profile["价格"] * rng.lognormal(0, 0.3)), 1),
+                "菜品类别": category,
+                "适用餐时段": meal_times,
+                "能量(Kcal)": round(float(energy)),
+                **macros,
+            }
+        )
+    return dishes
+
+
+def generate_meal_config(dishes_per_day):
+    """每日 dishes_per_day 道菜的餐类配置（按 SLOT_ORDER 依次加入槽位）"""
+    if not 1 <= dishes_per_day <= len(SLOT_ORDER):
+        raise ValueError(
+            f"每日菜品数量异常：{dishes_per_day}（应为1~{len(SLOT_ORDER)}）"
+        )
+    counts = {}
+    for slot in SLOT_ORDER[:dishes_per_day]:
+        counts[slot] = counts.get(slot, 0) + 1
+    return [
+        {"餐时段": meal_time, "菜品类别": category, "数量": count}
+        for (meal_time, category), count in counts.items()
+    ]
+
+
+def generate_standards(meal_config, quantile=0.75):
+    """
+    按各槽位类别菜品营养含量的分位数生成与餐类配置匹配的每日及每餐营养标准，
+    按价格均值生成每日餐标
+
+    贪心排餐倾向于选择营养含量高于中位数的菜品，标准取在上四分位附近时默认求解方式的
+    达标率处于中间水平，达标率的回归才能被比较出来。
+
+    Args:
+        meal_config: 餐类配置
+        quantile: 菜品营养含量的分位数
+
+    Returns:
+        (nutrition_std, meal_nutrition_std, 每日餐标(元))
+    """
+    z = NormalDist().inv_cdf(quantile)
+    meal_totals = {}
+    budget = 0.0
+    for item in meal_config:
+        profile = CATEGORY_PROFILES[item["菜品类别"]]
+        # 对数正态分布的 q 分位数为 中位数 * exp(sigma * z_q)，均值为 中位数 * exp(sigma^2 / 2)
+        scale = float(np.exp(profile["离散度"] * z))
+        macros = {n: v * scale for n, v in profile["宏量"].items()}
+        typical = {"能量(Kcal)": _energy(macros), **macros}
+        totals = meal_totals.setdefault(item["餐时段"], dict.fromkeys(NUTRIENTS, 0.0))
+        for n in NUTRIENTS:
+            totals[n] += typical[n] * item["数量"]
+        budget += profile["价格"] * float(np.exp(0.3**2 / 2)) * item["数量"]
+
+    meal_nutrition_std = [
+        {"餐时段": meal_time, "营养素名称": n, "标准值": round(totals[n], 1)}
+        for meal_time, totals in meal_totals.items()
+        for n in NUTRIENTS
+    ]
+    nutrition_std = [
+        {
+            "营养素名称": n,
+            "标准值": round(sum(totals[n] for totals in meal_totals.values()), 1),
+        }
+        for n in NUTRIENTS
+    ]
+    return nutrition_std, meal_nutrition_std, round(budget)
+
+
+def generate_bundle(
+    n_dishes, days, dishes_per_day=8, category_mix=None, seed=0, sys_config=None
+):
+    """
+    生成一个完整的排餐输入包（与 get_input_data 的返回值及批量排餐的输入包一致）
+
+    Args:
+        n_dishes: 菜品数量
+        days: 配餐天数
+        dishes_per_day: 每日菜品数量（槽位数）
+        category_mix: 类别占比字典
+        seed: 随机种子
+        sys_config: 覆盖默认系统配置的字段
+
+    Returns:
+        输入包字典：dishes、meal_config、nutrition_std、meal_nutrition_std、sys_config
+    """
+    meal_config = generate_meal_config(dishes_per_day)
+    nutrition_std, meal_nutrition_std, budget = generate_standards(meal_config)
+    config = {
+        "菜品最小重复天数": 3,
+        "营养权重": 0.5,
+        "每日餐标(元)": budget,
+        "配餐天数": days,
+        "餐标浮动比例": 0.15,
+        "营养素偏差比例": dict.fromkeys(NUTRIENTS, 0.2),
+        "整体权重上限": 0.3,
+        "多样性权重": 0.2,
+        "top_k": 3,
+        "temperature": 0.3,
+    }
+    config.update(sys_config or {})
+    return {
+        "name": f"bench-{n_dishes}x{days}x{dishes_per_day}",
+        "dishes": generate_dishes(n_dishes, category_mix, seed=seed),
+        "meal_config": meal_config,
+        "nutrition_std": nutrition_std,
+        "meal_nutrition_std": meal_nutrition_std,
+        "sys_config": config,
+    }
@@ -0,0 +1,255 @@
+import sys
+import json
+
+import numpy as np
+
+from meal_planner_lib import PlannerModel
+from meal_planner_lib.scoring import (
+    NEVER_USED,
+    compute_score,
+    compute_scores,
+    compute_total_weight,
+)
+
+from .generator import NUTRIENTS, generate_bundle
+from .run import INPUT_KEYS
+
+# 向量化与逐菜品评分的最大允许误差（两者使用相同的营养数据，仅浮点求和顺序不同）
+SCORE_TOLERANCE = 1e-9
+
+# 向量化评分与原始评分公式的最大允许误差：原始公式使用输入的菜品字典（float64），
+# 排餐模型使用菜品目录中的 float32 营养素矩阵，每个营养值有约 2**-24（6e-8）的相对舍入误差，
+# 经按标准值相除、加权平均后，得分误差不超过 1e-8 量级（合成数据实测约 5e-9）
+BASELINE_TOLERANCE = 1e-7
+
+
+def baseline_score(
+    dish,
+    day,
+    meal_nutrition_std,
+    nutrition_std_dict,
+    current_meal_nutrition,
+    current_day_nutrition,
+    total_nutrition,
+    current_day_price,
+    total_price,
+    remaining_dishes,
+    last_used,
+    sys_config,
+):
+    """
+    原始评分公式（逐菜品评分改为按营养素通用化之前的版本，只计能量、蛋白质、脂肪、碳水化合物）
+
+    参数同 compute_score（nutrients 固定为 NUTRIENTS、营养素权重均为1），用作评分一致性检查的基准。
+    """
+    days = sys_config["配餐天数"]
+    budget = sys_config["每日餐标(元)"]
+
+    def nutrient_score(current, std, scale=1):
+        return (
+            sum(
+                1 - abs((current[n] + dish[n]) / (std[n] * scale) - 1)
+                for n in NUTRIENTS
+            )
+            / 4
+        )
+
+    nutri_score_meal = nutrient_score(current_meal_nutrition, meal_nutrition_std)
+    nutri_score_day = nutrient_score(current_day_nutrition, nutrition_std_dict)
+    nutri_score_total = nutrient_score(total_nutrition, nutrition_std_dict, days)
+
+    remaining_budget = budget - current_day_price
+    if remaining_budget <= 0:
+        remaining_budget = 0.01
+    dynamic_avg = remaining_budget / remaining_dishes
+    price_score_dynamic = 1 - abs(dish["最终定价"] / dynamic_avg - 1)
+    price_score_day = 1 - abs((current_day_price + dish["最终定价"]) / budget - 1)
+    price_score_day = (price_score_day + price_score_dynamic) / 2
+    price_score_total = 1 - abs((total_price + dish["最终定价"]) / (budget * days) - 1)
+
+    total_weight = compute_total_weight(day, sys_config)
+    nutri_score = (1 - total_weight) * (
+        nutri_score_day * 0.5 + nutri_score_meal * 0.5
+    ) + total_weight * nutri_score_total
+    price_score = (
+        1 - total_weight
+    ) * price_score_day + total_weight * price_score_total
+    score = (
+        sys_config["营养权重"] * nutri_score
+        + (1 - sys_config["营养权重"]) * price_score
+    )
+    if dish["菜品类别"] == "主":
+        return score
+
+    # 多样性保障机制：过去3天内使用过减0.1分，超过7天未使用/从未使用加0.2分
+    dish_id = dish["菜品ID"]
+    recent_use = sum(1 for d in range(day - 3, day) if last_used.get(dish_id, -1) == d)
+    diversity_score = -0.1 * recent_use
+    if dish_id not in last_used or (day - last_used[dish_id]) > 7:
+        diversity_score += 0.2
+    return (1 - sys_config["多样性权重"]) * score + sys_config[
+        "多样性权重"
+    ] * diversity_score
+
+
+def check_scores(bundle, samples=50, seed=0):
+    """
+    在随机生成的排餐中间状态下，比较同一槽位全部候选菜品的三种评分：
+    compute_scores（向量化）、compute_score（逐菜品）和 baseline_score（原始公式，
+    使用 bundle 中原始的菜品字典，而不是由菜品目录还原的菜品）
+
+    Returns:
+        {"samples": 状态数, "scores": 评分菜品次数, "scalar_max_diff": 向量化与逐菜品评分的最大误差,
+         "baseline_max_diff": 向量化与原始公式的最大误差, "ok": 两项误差是否分别不超过
+         SCORE_TOLERANCE 和 BASELINE_TOLERANCE}
+    """
+    inputs = {key: bundle[key] for key in INPUT_KEYS}
+    sys_config = inputs.pop("sys_config")
+    model = PlannerModel(**inputs)
+    rng = np.random.default_rng(seed)
+    days = sys_config["配餐天数"]
+    budget = sys_config["每日餐标(元)"]
+    day_std = np.array([model.nutrition_std_dict[n] for n in model.nutrients])
+    originals = {}
+    for dish in bundle["dishes"]:
+        originals.setdefault(dish["菜品ID"], dish)
+
+    scalar_diff = baseline_diff = 0.0
+    n_scores = 0
+    for _ in range(samples):
+        meal_time, category, _, pool = model.slots[rng.integers(len(model.slots))]
+        meal_std = model.meal_nutrition_std_dict[meal_time]
+        day = int(rng.integers(days))
+        # 随机的已选部分营养和价格累计（当前餐、当日及整体）
+        meal_nutrition = np.array([meal_std[n] for n in model.nutrients]) * rng.uniform(
+            0, 1
+        )
+        day_nutrition = day_std * rng.uniform(0, 1)
+        total_nutrition = day_std * day * rng.uniform(0.8, 1.2)
+        day_price = budget * rng.uniform(0, 1.2)
+        total_price = budget * day * rng.uniform(0.8, 1.2)
+        remaining = int(rng.integers(1, model.total_dishes_per_day + 1))
+        # 随机的最后使用日期：约一半从未使用，其余落在过去10天内
+        last_used_arr = np.where(
+            rng.random(len(pool)) < 0.5,
+            NEVER_USED,
+            day - rng.integers(1, 11, size=len(pool)),
+        )
+        last_used = {
+            model.catalog.ids[g]: int(d)
+            for g, d in zip(pool.gidx.tolist(), last_used_arr)
+            if d != NEVER_USED
+        }
+
+        vector = compute_scores(
+            pool,
+            np.arange(len(pool)),
+            day,
+            last_used_arr,
+            meal_nutrition,
+            day_nutrition,
+            total_nutrition,
+            day_price,
+            total_price,
+            remaining,
+            compute_total_weight(day, sys_config),
+            category == "主",
+            sys_config,
+        )
+        accumulated = [
+            dict(zip(model.nutrients, values.tolist()))
+            for values in (meal_nutrition, day_nutrition, total_nutrition)
+        ]
+        for row, g in enumerate(pool.gidx.tolist()):
+            args = (
+                day,
+                meal_std,
+                model.nutrition_std_dict,
+                *accumulated,
+                day_price,
+                total_price,
+                remaining,
+                last_used,
+                sys_config,
+            )
+            scalar = compute_score(model.dish(g), *args, model.nutrients)
+            baseline = baseline_score(originals[model.catalog.ids[g]], *args)
+            scalar_diff = max(scalar_diff, abs(vector[row] - scalar))
+            baseline_diff = max(baseline_diff, abs(vector[row] - baseline))
+        n_scores += len(pool)
+
+    return {
+        "samples": samples,
+        "scores": n_scores,
+        "scalar_max_diff": float(scalar_diff),
+        "baseline_max_diff": float(baseline_diff),
+        "ok": bool(
+            scalar_diff <= SCORE_TOLERANCE and baseline_diff <= BASELINE_TOLERANCE
+        ),
+    }
+
+
+def _plan_json(result):
+    """排餐结果中需逐项一致的部分（每日方案和警告），序列化后用于比较"""
+    return json.dumps(
+        [result["meal_plan"], result["warnings"]], ensure_ascii=False, sort_keys=True
+    )
+
+
+def check_modes(bundle, seed=0):
+    """同一种子下向量化与逐菜品评分模式生成的方案应完全一致"""
+    inputs = {key: bundle[key] for key in INPUT_KEYS}
+    sys_config = inputs.pop("sys_config")
+    model = PlannerModel(**inputs)
+    vector = model.plan(sys_config, seed=seed, score_mode="vector")
+    scalar = model.plan(sys_config, seed=seed, score_mode="scalar")
+    return {"ok": _plan_json(vector) == _plan_json(scalar)}
+
+
+def check_resume(bundle, seed=0, split_day=None):
+    """
+    断点续排回归检查：在第 split_day 天结束时保存快照（经 JSON 序列化往返），
+    由快照续排的方案应与不中断生成的方案完全一致
+
+    Args:
+        split_day: 保存快照的天数，默认为配餐天数的一半
+    """
+    inputs = {key: bundle[key] for key in INPUT_KEYS}
+    sys_config = inputs.pop("sys_config")
+    model = PlannerModel(**inputs)
+    if split_day is None:
+        split_day = max(1, sys_config["配餐天数"] // 2)
+
+    snapshots = []
+
+    def checkpoint(state):
+        if state.day == split_day:
+            snapshots.append(json.dumps(state.to_dict(), ensure_ascii=False))
+
+    full = model.plan(sys_config, seed=seed, checkpoint=checkpoint)
+    resumed = model.resume(json.loads(snapshots[0]), sys_config)
+    return {"split_day": split_day, "ok": _plan_json(full) == _plan_json(resumed)}
+
+
+def run_checks(n_dishes=300, days=14, dishes_per_day=8, seed=0, log=None):
+    """
+    运行全部一致性检查
+
+    Returns:
+        {"scores": check_scores 结果, "modes": check_modes 结果, "resume": check_resume 结果}
+    """
+    bundle = generate_bundle(n_dishes, days, dishes_per_day, seed=seed)
+    results = {}
+    for name, check in [
+        ("scores", check_scores),
+        ("modes", check_modes),
+        ("resume", check_resume),
+    ]:
+        results[name] = check(bundle, seed=seed)
+        if log is not None:
+            log(name, results[name])
+    return results
+
+
+def print_check(name, result):
+    print(f"{name}: {'✅' if result['ok'] else '❌'} {result}", file=sys.stderr)
@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from meal_planner_lib import generate_meal_plan, PlannerModel
+from meal_planner_lib.compliance import evaluate_plan
+
+from .generator import generate_bundle
+
+# 预设的基准网格：菜品数量 × 配餐天数 × 每日菜品数量
+GRIDS = {
+    "quick": {"dishes": [1000, 10000], "days": [7, 30], "dishes_per_day": [8]},
+    "full": {
+        "dishes": [1000, 10000, 100000],
+        "days": [7, 30, 90, 365],
+        "dishes_per_day": [6, 12],
+    },
+    # 长周期：检查每天的耗时是否随天数增长
+    "horizon": {"dishes": [1000, 10000], "days": [365], "dishes_per_day": [8, 12]},
+}
+
+INPUT_KEYS = [
+    "dishes",
+    "meal_config",
+    "nutrition_std",
+    "meal_nutrition_std",
+    "sys_config",
+]
+
+
+def case_name(n_dishes, days, dishes_per_day):
+    return f"{n_dishes}x{days}x{dishes_per_day}"
+
+
+def run_case(n_dishes, days, dishes_per_day, repeat=3, seed=0, score_mode="vector"):
+    """
+    对一组参数计时 generate_meal_plan
+
+    延迟取 repeat 次运行的中位数（不开启 tracemalloc）；峰值内存在另一次开启 tracemalloc 的
+    运行中测量；达标率为达标天数占配餐天数的比例（按 evaluate_plan 评估）；每天耗时的变化
+    在另一次开启分阶段计时的运行中测量（见 day_latency）。
+
+    Returns:
+        基准结果字典，生成失败时 error 为错误信息、其余指标为 None
+    """
+    bundle = generate_bundle(n_dishes, days, dishes_per_day, seed=seed)
+    inputs = {key: bundle[key] for key in INPUT_KEYS}
+    case = {
+        "name": case_name(n_dishes, days, dishes_per_day),
+        "dishes": n_dishes,
+        "days": days,
+        "dishes_per_day": dishes_per_day,
+        "runs": repeat,
+        "latency_s": None,
+        "per_day_ms": None,
+        "peak_memory_mb": None,
+        "compliance_rate": None,
+        "day_latency": None,
+        "error": None,
+    }
+
+    try:
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = generate_meal_plan(**inputs, score_mode=score_mode, seed=seed)
+            latencies.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            generate_meal_plan(**inputs, score_mode=score_mode, seed=seed)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        profiled = generate_meal_plan(
+            **inputs, score_mode=score_mode, seed=seed, profile=True
+        )
+    except ValueError as e:
+        case["error"] = str(e)
+        return case
+
+    model = PlannerModel(
+        inputs["dishes"],
+        inputs["meal_config"],
+        inputs["nutrition_std"],
+        inputs["meal_nutrition_std"],
+    )
+    compliance = evaluate_plan(model, result, inputs["sys_config"])
+    latency = statistics.median(latencies)
+    case.update(
+        latency_s=round(latency, 4),
+        per_day_ms=round(latency * 1000 / days, 3),
+        peak_memory_mb=round(peak / 2**20, 2),
+        compliance_rate=round(1 - compliance["violation_days"] / days, 4),
+        day_latency=day_latency(profiled["timings"]["days"]["per_day_ms"]),
+    )
+    return case
+
+
+def day_latency(per_day_ms):
+    """
+    每天耗时随天数的变化：前10%和后10%天数（至少1天）的中位耗时及其比值
+
+    每天的耗时不随天数增长时 growth 约为1。
+    """
+    window = max(1, len(per_day_ms) // 10)
+    first = statistics.median(per_day_ms[:window])
+    last = statistics.median(per_day_ms[-window:])
+    return {
+        "first_ms": round(first, 3),
+        "last_ms": round(last, 3),
+        "growth": round(last / first, 3) if first > 0 else None,
+    }
+
+
+def run_grid(grid, repeat=3, seed=0, score_mode="vector", log=None):
+    """
+    按网格运行全部基准
+
+    Args:
+        grid: {"dishes": [...], "days": [...], "dishes_per_day": [...]}
+        repeat: 每组参数的计时次数
+        seed: 随机种子（菜品目录生成和排餐共用）
+        score_mode: 评分模式
+        log: 每组参数完成后调用 log(case)，可用于输出进度
+
+    Returns:
+        基准结果字典：meta（运行环境和参数）和 cases（各组参数的结果）
+    """
+    started = datetime.now(timezone.utc)
+    cases = []
+    for n_dishes in grid["dishes"]:
+        for days in grid["days"]:
+            for dishes_per_day in grid["dishes_per_day"]:
+                case = run_case(
+                    n_dishes,
+                    days,
+                    dishes_per_day,
+                    repeat=repeat,
+                    seed=seed,
+                    score_mode=score_mode,
+                )
+                cases.append(case)
+                if log:
+                    log(case)
+    return {
+        "meta": {
+            "created": started.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "grid": grid,
+            "repeat": repeat,
+            "seed": seed,
+            "score_mode": score_mode,
+        },
+        "cases": cases,
+    }
+
+
+def print_case(case):
+    if case["error"]:
+        print(f"{case['name']}: ❌ {case['error']}", file=sys.stderr)
+        return
+    print(
+        f"{case['name']}: {case['latency_s']:.3f}s（{case['per_day_ms']:.2f} ms/天，"
+        f"首/末10%天数 {case['day_latency']['first_ms']:.2f}/{case['day_latency']['last_ms']:.2f} ms），"
+        f"峰值内存 {case['peak_memory_mb']:.1f} MB，达标率 {case['compliance_rate']:.1%}",
+        file=sys.stderr,
+    )
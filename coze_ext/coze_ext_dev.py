@@ -3,30 +3,195 @@
 # from runtime import Args
 # from typings.meal_planner_lark.meal_planner_lark import Input, Output
 
-import json, collections
+import os
+import json
+import time
+import uuid
+import random
+import threading
+import http.cookiejar
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 import lark_oapi as lark  # lark-oapi v1.4.12
 from lark_oapi.api.bitable.v1 import *
+import lark_oapi.core.http.transport as lark_transport
 
 from easydict import EasyDict as edict
 import logging
 
-from meal_planner_lib.meal_planner import generate_meal_plan
+from meal_planner_lib.anytime import generate_meal_plan_within_budget
+from meal_planner_lib.report import render_plan
 from meal_planner_lib.example_data_2 import *
 
+# 租户调用多维表格接口的 QPS 配额，由所有线程共享，可通过环境变量 LARK_QPS 按租户实际配额配置
+LARK_QPS = float(os.environ.get("LARK_QPS", "10"))
+
+# 最大重试次数及指数退避的初始/最大等待时间（秒）
+LARK_MAX_RETRIES = 5
+LARK_BACKOFF_BASE = 0.5
+LARK_BACKOFF_MAX = 8.0
+
+# 限流错误码：请求频率超限
+LARK_THROTTLE_CODES = {99991400, 1254290}
+# 其余可重试的错误码：数据表写冲突、数据未就绪、服务内部错误、请求超时
+LARK_TRANSIENT_CODES = {1254291, 1254607, 1255001, 1255002, 1255040}
+
+
+class TokenBucket:
+    """令牌桶限流器（线程安全）：每秒补充 rate 个令牌，最多积累 capacity 个"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，令牌不足时等待，返回等待的秒数"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class LarkCaller:
+    """
+    飞书接口调用封装：令牌桶限流，限流和临时错误按带抖动的指数退避重试，并记录调用指标
 
-# 构造飞书多维表格插件的请求选项
-def build_lark_request_option(user_access_token):
+    指标包括调用次数、重试次数、限流响应次数、等待令牌的总时长以及每次调用的耗时，
+    可通过 reset() 清零、summary() 汇总。
+    """
+
+    def __init__(
+        self,
+        qps=LARK_QPS,
+        max_retries=LARK_MAX_RETRIES,
+        backoff_base=LARK_BACKOFF_BASE,
+        backoff_max=LARK_BACKOFF_MAX,
+    ):
+        self.bucket = TokenBucket(qps)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清零调用指标"""
+        with self.lock:
+            self.calls = []  # 每次调用：(接口名称, 耗时毫秒, 第几次尝试, 返回码)
+            self.retries = 0
+            self.throttled = 0
+            self.throttle_wait = 0.0
+
+    def _record(self, name, elapsed, attempt, code, waited):
+        with self.lock:
+            self.calls.append((name, round(elapsed * 1000, 1), attempt, code))
+            self.throttle_wait += waited
+
+    def _backoff(self, attempt):
+        """第 attempt 次重试前的等待时间（全抖动指数退避）"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def call(self, name, func, request, option):
+        """
+        调用接口 func(request, option)
+
+        限流和临时错误码（LARK_THROTTLE_CODES、LARK_TRANSIENT_CODES）、HTTP 429/5xx 及网络错误
+        最多重试 max_retries 次；其余失败响应及重试耗尽后的响应直接返回，由调用方处理。
+        """
+        for attempt in range(self.max_retries + 1):
+            waited = self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = func(request, option)
+            except OSError as e:
+                self._record(name, time.perf_counter() - start, attempt, None, waited)
+                if attempt == self.max_retries:
+                    raise
+                lark.logger.warning(f"{name} failed: {e}, retrying")
+            else:
+                self._record(
+                    name, time.perf_counter() - start, attempt, response.code, waited
+                )
+                if response.success():
+                    return response
+                status = getattr(response.raw, "status_code", None)
+                throttled = response.code in LARK_THROTTLE_CODES or status == 429
+                transient = response.code in LARK_TRANSIENT_CODES or (
+                    status is not None and status >= 500
+                )
+                if not (throttled or transient) or attempt == self.max_retries:
+                    return response
+                if throttled:
+                    with self.lock:
+                        self.throttled += 1
+                lark.logger.warning(
+                    f"{name} failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, retrying"
+                )
+            with self.lock:
+                self.retries += 1
+            time.sleep(self._backoff(attempt))
+
+    def summary(self):
+        """汇总调用指标：调用/重试/限流次数、等待令牌时长及各接口耗时（毫秒）"""
+        with self.lock:
+            calls = list(self.calls)
+            summary = {
+                "calls": len(calls),
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "throttle_wait_s": round(self.throttle_wait, 3),
+                "latency_ms": {},
+            }
+        for name in sorted({call[0] for call in calls}):
+            latencies = sorted(call[1] for call in calls if call[0] == name)
+            summary["latency_ms"][name] = {
+                "count": len(latencies),
+                "mean": round(sum(latencies) / len(latencies), 1),
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "max": latencies[-1],
+            }
+        return summary
+
+
+# 所有飞书接口调用共用的限流与重试封装（同一进程内的多次 handler 调用共享 QPS 配额）
+lark_caller = LarkCaller()
+
+
+# 由 token 前缀判断授权类型
+def get_token_type(user_access_token):
     if user_access_token.startswith("t-"):
         # 飞书多维表格插件只能使用 tenant_access_token 授权，以`t-`开头
+        return "tenant"
+    elif user_access_token.startswith("u-"):
+        return "user"
+    else:
+        raise ValueError(f"Invalid user_access_token: {user_access_token}")
+
+
+# 构造飞书多维表格插件的请求选项
+def build_lark_request_option(user_access_token):
+    if get_token_type(user_access_token) == "tenant":
         option = (
             lark.RequestOption.builder().tenant_access_token(user_access_token).build()
         )
-    elif user_access_token.startswith("u-"):
+    else:
         option = (
             lark.RequestOption.builder().user_access_token(user_access_token).build()
         )
-    else:
-        raise ValueError(f"Invalid user_access_token: {user_access_token}")
     return option
 
 
@@ -62,6 +227,10 @@ def extract_field_value(field_data):
         return field_data
 
 
+# 按营养素配置的系统配置项，配置名称为 “配置项-营养素名称”
+NUTRIENT_SYS_CONFIGS = ["营养素偏差比例", "营养素权重"]
+
+
 # 将飞书系统配置记录转为标准配置格式
 def convert_feishu_sys_config_to_standard_data(records):
     """
@@ -101,10 +270,10 @@ def convert_feishu_sys_config_to_standard_data(records):
             # 如果转换失败，保持原始值
             pass
 
-        if config_name.startswith("营养素偏差比例"):
-            if "营养素偏差比例" not in sys_config:
-                sys_config["营养素偏差比例"] = {}
-            sys_config["营养素偏差比例"][config_name.split("-")[-1]] = config_value
+        # 按营养素配置的项（如 “营养素偏差比例-能量(Kcal)”）归入同一个字典
+        group = config_name.split("-")[0]
+        if group in NUTRIENT_SYS_CONFIGS:
+            sys_config.setdefault(group, {})[config_name.split("-")[-1]] = config_value
         else:
             sys_config[config_name] = config_value
 
@@ -144,6 +313,20 @@ def convert_feishu_records_to_standard_data(records):
     return standard_data
 
 
+# 多维表格查询记录接口允许的最大分页大小
+SEARCH_PAGE_SIZE = 500
+
+
+def record_to_dict(record):
+    """由 SDK 返回的 AppTableRecord 对象直接构造记录字典（不经过 JSON 序列化）"""
+    item = {}
+    if record.fields is not None:
+        item["fields"] = record.fields
+    if record.record_id is not None:
+        item["record_id"] = record.record_id
+    return item
+
+
 # 获取飞书表格数据
 def get_feishu_table_data(
     client,
@@ -153,7 +336,17 @@ def get_feishu_table_data(
     filter=None,
     field_names=None,
     automatic_fields=False,
+    convert=None,
 ):
+    """
+    按最大分页大小分页查询飞书表格记录
+
+    传入 convert 时（如 convert_feishu_records_to_standard_data），每一页的记录在后台线程中
+    转换，与下一页的请求重叠进行。
+
+    Returns:
+        记录列表，格式如 [{'fields': {...}, 'record_id': '...'}]；传入 convert 时为各页转换结果拼接成的列表
+    """
     # 构造请求体
     request_body_builder = SearchAppTableRecordRequestBody.builder()
     if filter:
@@ -167,69 +360,174 @@ def get_feishu_table_data(
     request_builder = SearchAppTableRecordRequest.builder()
     request_builder.app_token(app_token)
     request_builder.table_id(table_id)
-    request_builder.page_size(80)  # 分页大小
+    request_builder.page_size(SEARCH_PAGE_SIZE)  # 分页大小
     request_builder.request_body(request_body_builder.build())
 
     option = build_lark_request_option(user_access_token)
 
-    all_records = []
+    pages = []
     page_token = None
 
     # 分页获取数据
-    while True:
-        if page_token:
-            request_builder.page_token(page_token)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        while True:
+            if page_token:
+                request_builder.page_token(page_token)
+
+            # 构建最终请求
+            request: SearchAppTableRecordRequest = request_builder.build()
+
+            # 发起请求
+            response: SearchAppTableRecordResponse = lark_caller.call(
+                "app_table_record.search",
+                client.bitable.v1.app_table_record.search,
+                request,
+                option,
+            )
+
+            # 处理失败返回
+            if not response.success():
+                error_msg = f"client.bitable.v1.app_table_record.search failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
+                lark.logger.error(error_msg)
+                raise Exception(error_msg)
+
+            # 处理业务结果：直接读取 SDK 对象，需要转换时交给后台线程
+            records = [record_to_dict(item) for item in response.data.items or []]
+            if convert is None:
+                pages.append(records)
+            else:
+                pages.append(executor.submit(convert, records))
+
+            # 检查是否还有更多记录
+            if not response.data.has_more:
+                break
+
+            # 更新 page_token
+            page_token = response.data.page_token
+
+    all_records = []
+    for page in pages:
+        all_records.extend(page if convert is None else page.result())
+    return all_records
 
-        # 构建最终请求
-        request: SearchAppTableRecordRequest = request_builder.build()
 
-        # 发起请求
-        response: SearchAppTableRecordResponse = (
-            client.bitable.v1.app_table_record.search(request, option)
-        )
+# 飞书 SDK 日志级别（DEBUG / INFO / WARNING / ERROR / CRITICAL），可通过环境变量 LARK_LOG_LEVEL 配置
+LARK_LOG_LEVEL = os.environ.get("LARK_LOG_LEVEL", "WARNING")
 
-        # 处理失败返回
-        if not response.success():
-            error_msg = f"client.bitable.v1.app_table_record.search failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
-            lark.logger.error(error_msg)
-            raise Exception(error_msg)
+# 是否复用 keep-alive 连接（默认开启），可通过环境变量 LARK_KEEP_ALIVE=0 关闭
+LARK_KEEP_ALIVE = os.environ.get("LARK_KEEP_ALIVE", "1") == "1"
 
-        # 处理业务结果
-        result_json = lark.JSON.marshal(response.data, indent=4)
-        result_dict = json.loads(result_json, object_pairs_hook=collections.OrderedDict)
-        all_records.extend(result_dict["items"])
+# keep-alive 连接池大小，不小于并发获取输入数据和并发写入的线程数之和
+LARK_POOL_SIZE = 10
 
-        # 检查是否还有更多记录
-        if not response.data.has_more:
-            break
+# 按 (授权类型, 日志级别) 缓存的 client，同一进程内的多次 handler 调用（热启动）直接复用
+_lark_clients = {}
+_lark_clients_lock = threading.Lock()
+_lark_session = None
 
-        # 更新 page_token
-        page_token = response.data.page_token
 
-    return all_records
+def create_lark_session(pool_size=LARK_POOL_SIZE):
+    """
+    创建所有线程共用的 requests.Session
+
+    连接保存在 Session 的连接池（urllib3，线程安全）中，与发起请求的线程无关，
+    因此每次调用各自创建的线程池结束后，连接仍留在池中供下一次调用（含热启动）复用。
+    Session 上唯一跨请求的可变状态是 cookie，这里拒绝所有 cookie，与 requests.request 的行为一致。
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def enable_lark_keep_alive():
+    """
+    SDK 默认每个请求新建一个连接，改为通过模块级的 Session 复用 keep-alive 连接
+
+    LARK_KEEP_ALIVE 开启时由 create_client 调用，重复调用无副作用。
+    替换点依赖 SDK 内部实现：lark-oapi v1.4.12 的 lark_oapi.core.http.transport 通过模块级的
+    requests.request(method, url, headers=..., params=..., data=..., files=..., timeout=...) 发送请求，
+    这里将该模块中的 requests 替换为 Session（Session.request 的参数与之兼容）。
+    升级 SDK 时需确认该调用方式未变；若 transport 模块不再引用 requests，则不做替换，
+    退回 SDK 默认的每请求一个连接。
+
+    Returns:
+        是否已启用
+    """
+    global _lark_session
+    if _lark_session is not None:
+        return True
+    if getattr(lark_transport, "requests", None) is not requests:
+        lark.logger.warning(
+            "lark_oapi.core.http.transport 未按预期引用 requests，不启用 keep-alive 连接复用"
+        )
+        return False
+    _lark_session = create_lark_session()
+    lark_transport.requests = _lark_session
+    return True
 
 
 # 创建client
-def create_client():
-    # 使用 user_access_token 需开启 token 配置, 并在 request_option 中配置 token
-    client = (
-        lark.Client.builder()
-        .enable_set_token(True)
-        .log_level(lark.LogLevel.DEBUG)
-        .build()
-    )
+def create_client(token_type="tenant", log_level=None):
+    """
+    获取飞书 client
+
+    按 (授权类型, 日志级别) 缓存，热启动时不再重新构建；LARK_KEEP_ALIVE 开启（默认）时
+    所有 client 共用一个 Session 复用 keep-alive 连接（见 enable_lark_keep_alive）。
+
+    Args:
+        token_type: 授权类型，tenant 或 user（见 get_token_type）
+        log_level: SDK 日志级别名称，默认为 LARK_LOG_LEVEL
+    """
+    log_level = (log_level or LARK_LOG_LEVEL).upper()
+    if log_level not in lark.LogLevel.__members__:
+        raise ValueError(f"Invalid log_level: {log_level}")
+
+    key = (token_type, log_level)
+    with _lark_clients_lock:
+        client = _lark_clients.get(key)
+        if client is None:
+            if LARK_KEEP_ALIVE:
+                enable_lark_keep_alive()
+            # 使用 user_access_token 需开启 token 配置, 并在 request_option 中配置 token
+            client = (
+                lark.Client.builder()
+                .enable_set_token(True)
+                .log_level(lark.LogLevel[log_level])
+                .build()
+            )
+            _lark_clients[key] = client
     return client
 
 
+# 输入数据及其所在的飞书表格
+INPUT_TABLES = {
+    "dishes": "01-菜品管理",
+    "meal_config": "05-餐类配置",
+    "nutrition_std": "95-营养标准-每日",
+    "meal_nutrition_std": "06-营养标准-每餐",
+    "sys_config": "07-系统配置",
+}
+
+# 并发获取输入数据的最大线程数
+INPUT_FETCH_WORKERS = 5
+
+
 # 从飞书表格获取输入数据
-def get_input_data(client, args_input, return_data=None):
-    data_list = [
-        "dishes",
-        "meal_config",
-        "nutrition_std",
-        "meal_nutrition_std",
-        "sys_config",
-    ]
+def get_input_data(
+    client, args_input, return_data=None, max_workers=INPUT_FETCH_WORKERS
+):
+    """
+    从飞书表格获取输入数据
+
+    各数据表在线程池中共用同一个 client 并发获取（max_workers 为 1 时依次获取）。
+    菜品表只获取每日营养标准中列出的营养素列，因此获取菜品数据时会先等待每日营养标准获取完成
+    （return_data 中没有 nutrition_std 时也会获取，但不包含在返回结果中）。
+    任一数据表获取失败时，等待其余数据表完成后抛出异常，异常信息逐个列出失败的数据表及其错误。
+    """
+    data_list = list(INPUT_TABLES)
     if return_data is None:
         return_data = data_list
     elif isinstance(return_data, str):
@@ -239,10 +537,9 @@ def get_input_data(client, args_input, return_data=None):
             if data not in data_list:
                 raise ValueError(f"Invalid return_data: {data}")
 
-    result = {}
-
-    # 获取菜品数据
-    if "dishes" in return_data:
+    # 获取菜品数据（营养素列与每日营养标准一致）
+    def get_dishes():
+        nutrients = [item["营养素名称"] for item in futures["nutrition_std"].result()]
         dishes = get_feishu_table_data(
             client,
             args_input.app_token,
@@ -263,20 +560,17 @@ def get_input_data(client, args_input, return_data=None):
                 "最终定价",
                 "菜品类别",
                 "适用餐时段",
-                "能量(Kcal)",
-                "蛋白质(g)",
-                "脂肪(g)",
-                "碳水化合物(g)",
+                *nutrients,
             ],
+            convert=convert_feishu_records_to_standard_data,
         )
-        dishes = convert_feishu_records_to_standard_data(dishes)
         # 令 “菜品ID” = “record_id” 方便后续双向连接
         for dish in dishes:
             dish["菜品ID"] = dish["record_id"]
-        result["dishes"] = dishes
+        return dishes
 
     # 获取餐类配置
-    if "meal_config" in return_data:
+    def get_meal_config():
         meal_config = get_feishu_table_data(
             client,
             args_input.app_token,
@@ -287,12 +581,12 @@ def get_input_data(client, args_input, return_data=None):
                 "菜品类别",
                 "数量",
             ],
+            convert=convert_feishu_records_to_standard_data,
         )
-        meal_config = convert_feishu_records_to_standard_data(meal_config)
-        result["meal_config"] = meal_config
+        return meal_config
 
     # 获取每日营养标准
-    if "nutrition_std" in return_data:
+    def get_nutrition_std():
         nutrition_std = get_feishu_table_data(
             client,
             args_input.app_token,
@@ -302,12 +596,12 @@ def get_input_data(client, args_input, return_data=None):
                 "营养素名称",
                 "标准值",
             ],
+            convert=convert_feishu_records_to_standard_data,
         )
-        nutrition_std = convert_feishu_records_to_standard_data(nutrition_std)
-        result["nutrition_std"] = nutrition_std
+        return nutrition_std
 
     # 获取每餐营养标准
-    if "meal_nutrition_std" in return_data:
+    def get_meal_nutrition_std():
         meal_nutrition_std = get_feishu_table_data(
             client,
             args_input.app_token,
@@ -318,12 +612,12 @@ def get_input_data(client, args_input, return_data=None):
                 "营养素名称",
                 "标准值",
             ],
+            convert=convert_feishu_records_to_standard_data,
         )
-        meal_nutrition_std = convert_feishu_records_to_standard_data(meal_nutrition_std)
-        result["meal_nutrition_std"] = meal_nutrition_std
+        return meal_nutrition_std
 
     # 获取系统配置
-    if "sys_config" in return_data:
+    def get_sys_config():
         sys_config = get_feishu_table_data(
             client,
             args_input.app_token,
@@ -341,34 +635,82 @@ def get_input_data(client, args_input, return_data=None):
             },
             field_names=["配置名称", "值"],
         )
-        sys_config = convert_feishu_sys_config_to_standard_data(sys_config)
-        result["sys_config"] = sys_config
+        return convert_feishu_sys_config_to_standard_data(sys_config)
+
+    fetchers = {
+        "dishes": get_dishes,
+        "meal_config": get_meal_config,
+        "nutrition_std": get_nutrition_std,
+        "meal_nutrition_std": get_meal_nutrition_std,
+        "sys_config": get_sys_config,
+    }
+    names = [
+        name
+        for name in data_list
+        if name in return_data or (name == "nutrition_std" and "dishes" in return_data)
+    ]
+    # 每日营养标准先于菜品数据提交，线程数为 1 时也不会互相等待
+    names.sort(key=lambda name: name != "nutrition_std")
+
+    futures = {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(names)))
+    ) as executor:
+        for name in names:
+            futures[name] = executor.submit(fetchers[name])
+
+    result = {}
+    errors = []
+    for name in data_list:
+        if name not in return_data:
+            continue
+        try:
+            result[name] = futures[name].result()
+        except Exception as e:
+            errors.append(f"{name}（{INPUT_TABLES[name]}）: {str(e)}")
+    if errors:
+        raise Exception("；".join(errors))
 
     return result
 
 
-# 飞书表格新增多条记录
-def add_feishu_records(client, app_token, table_id, user_access_token, records):
-    """在多维表格数据表中新增多条记录，单次调用最多新增 1,000 条记录"""
-    if isinstance(records, dict):
-        records = [records]
-    elif isinstance(records, list):
-        pass
-    else:
-        raise TypeError(
-            f"records参数类型错误: 期望dict或list，实际为{type(records).__name__}"
-        )
+# 多维表格新增多条记录接口单次调用允许的最大记录数
+BATCH_CREATE_SIZE = 1000
+
+# 分批新增记录时并发写入的最大线程数
+BATCH_CREATE_WORKERS = 4
+
+
+class BatchCreateError(Exception):
+    """
+    分批新增记录部分失败
+
+    record_ids 与输入记录一一对应（未写入的记录为 None），errors 为失败批次的
+    (起始序号, 结束序号, 错误信息) 列表，可据此只重试失败的批次。
+    """
 
+    def __init__(self, message, record_ids, errors):
+        super().__init__(message)
+        self.record_ids = record_ids
+        self.errors = errors
+
+
+# 调用一次批量新增记录接口
+def batch_create_feishu_records(client, app_token, table_id, option, records):
+    """
+    新增不超过 1,000 条记录，返回与 records 顺序一致的 record_id 列表
+
+    请求带有唯一的 client_token，限流重试时重复发送同一请求不会重复新增记录。
+    """
     # 构造 AppTableRecord List
     app_table_record_list = [
-        AppTableRecord.builder().fields(fields).build()
-        for fields in records
-        if isinstance(fields, dict)
+        AppTableRecord.builder().fields(fields).build() for fields in records
     ]
 
     # 构造请求对象
     request: BatchCreateAppTableRecordRequest = (
         BatchCreateAppTableRecordRequest.builder()
+        .client_token(str(uuid.uuid4()))
         .app_token(app_token)
         .table_id(table_id)
         .request_body(
@@ -380,9 +722,11 @@ def add_feishu_records(client, app_token, table_id, user_access_token, records):
     )
 
     # 发起请求
-    option = build_lark_request_option(user_access_token)
-    response: BatchCreateAppTableRecordResponse = (
-        client.bitable.v1.app_table_record.batch_create(request, option)
+    response: BatchCreateAppTableRecordResponse = lark_caller.call(
+        "app_table_record.batch_create",
+        client.bitable.v1.app_table_record.batch_create,
+        request,
+        option,
     )
 
     # 处理失败返回
@@ -391,16 +735,82 @@ def add_feishu_records(client, app_token, table_id, user_access_token, records):
         lark.logger.error(error_msg)
         raise Exception(error_msg)
 
-    # 处理业务结果
-    result_json = lark.JSON.marshal(response.data, indent=4)
-    result_dict = json.loads(result_json, object_pairs_hook=collections.OrderedDict)
+    # 处理业务结果：直接读取 SDK 对象
+    return [record.record_id for record in response.data.records]
 
-    if len(result_dict["records"]) == 1:
-        return result_dict["records"][0]["record_id"]  # 返回 record_id: string
+
+# 飞书表格新增多条记录
+def add_feishu_records(
+    client,
+    app_token,
+    table_id,
+    user_access_token,
+    records,
+    chunk_size=BATCH_CREATE_SIZE,
+    max_workers=BATCH_CREATE_WORKERS,
+):
+    """
+    在多维表格数据表中新增多条记录，不限条数
+
+    记录按 chunk_size 条（不超过单次调用上限 1,000 条）分批，各批次在线程池中并发写入
+    （max_workers 为 1 时依次写入），返回的 record_id 顺序与输入记录一致。
+    部分批次失败时，等待其余批次完成后抛出 BatchCreateError，其中记录已写入的 record_id。
+
+    Returns:
+        只有一条记录时返回其 record_id，否则返回 record_id 列表
+    """
+    if isinstance(records, dict):
+        records = [records]
+    elif isinstance(records, list):
+        pass
     else:
-        return [
-            record["record_id"] for record in result_dict["records"]
-        ]  # 返回 record_ids: string[]
+        raise TypeError(
+            f"records参数类型错误: 期望dict或list，实际为{type(records).__name__}"
+        )
+    if not 1 <= chunk_size <= BATCH_CREATE_SIZE:
+        raise ValueError(
+            f"chunk_size参数错误: 应在 1 ~ {BATCH_CREATE_SIZE} 之间，实际为{chunk_size}"
+        )
+
+    records = [fields for fields in records if isinstance(fields, dict)]
+    option = build_lark_request_option(user_access_token)
+
+    # 分批并发写入
+    starts = range(0, len(records), chunk_size)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(starts)))
+    ) as executor:
+        futures = [
+            executor.submit(
+                batch_create_feishu_records,
+                client,
+                app_token,
+                table_id,
+                option,
+                records[start : start + chunk_size],
+            )
+            for start in starts
+        ]
+
+    # 按批次位置回填 record_id，保持与输入记录一致的顺序
+    record_ids = [None] * len(records)
+    errors = []
+    for start, future in zip(starts, futures):
+        end = min(start + chunk_size, len(records))
+        try:
+            record_ids[start:end] = future.result()
+        except Exception as e:
+            errors.append((start, end, str(e)))
+    if errors:
+        created = sum(1 for record_id in record_ids if record_id is not None)
+        error_msg = f"add_feishu_records failed, table_id: {table_id}, created: {created}/{len(records)}, failed chunks: {[(start, end) for start, end, _ in errors]}, first error: {errors[0][2]}"
+        lark.logger.error(error_msg)
+        raise BatchCreateError(error_msg, record_ids, errors)
+
+    if len(record_ids) == 1:
+        return record_ids[0]  # 返回 record_id: string
+    else:
+        return record_ids  # 返回 record_ids: string[]
 
 
 # 将数据导入飞书表格
@@ -419,6 +829,9 @@ def import_data_to_feishu_table(
     else:
         raise ValueError(f"Invalid table_list: {table_list}")
 
+    # 由数值报告生成写入表格的对比字符串和警告信息
+    plan_data = render_plan(plan_data)
+
     new_plan_record_id = None
     new_plan_daily_record_ids = None
     if "plan" in table_list:
@@ -528,11 +941,15 @@ The return data of the function, which should match the declared output paramete
 """
 
 
-def handler(args):
-    client = create_client()
+# 配餐计划生成的默认时间预算（毫秒），为读取和导入飞书表格留出余量
+PLAN_TIME_BUDGET_MS = 20000
+
 
+def handler(args):
     # 获取输入数据
+    lark_caller.reset()
     try:
+        client = create_client(get_token_type(args.input.user_access_token))
         input_data = get_input_data(
             client,
             args.input,
@@ -547,6 +964,8 @@ def handler(args):
     except Exception as e:
         args.logger.error(f"获取输入数据时发生错误: {str(e)}")
         return {"message": f"获取输入数据失败: {str(e)}"}
+    finally:
+        args.logger.info(f"获取输入数据的飞书接口调用指标: {lark_caller.summary()}")
 
     args.logger.info(input_data)
 
@@ -558,13 +977,13 @@ def handler(args):
     #     "sys_config": sys_config,
     # }
 
-    # 最大配餐天数为40天
-    if input_data["sys_config"]["配餐天数"] > 40:
-        args.logger.error("配餐天数不能超过40天")
-        return {"message": "配餐天数不能超过40天"}
-
+    # 在时间预算内生成配餐计划（可在系统配置中设置 time_budget_ms），不再限制最大配餐天数
+    time_budget_ms = input_data["sys_config"].get("time_budget_ms", PLAN_TIME_BUDGET_MS)
     try:
-        result = generate_meal_plan(**input_data)
+        result = generate_meal_plan_within_budget(
+            **input_data, time_budget_ms=time_budget_ms
+        )
+        args.logger.info(f"配餐计划生成用时: {result['budget']}")
     except Exception as e:
         args.logger.error(f"生成配餐计划时发生错误: {str(e)}")
         return {"message": f"配餐计划生成失败: {str(e)}"}
@@ -573,6 +992,7 @@ def handler(args):
     result_json = json.dumps(result, ensure_ascii=False, indent=4)
     args.logger.info(f"生成的配餐计划: \n{result_json}")
 
+    lark_caller.reset()
     try:
         # 将配餐计划导入飞书表格
         import_data_to_feishu_table(
@@ -589,6 +1009,8 @@ def handler(args):
     except Exception as e:
         args.logger.error(f"导入配餐计划时发生错误: {str(e)}")
         return {"message": f"配餐计划导入失败: {str(e)}"}
+    finally:
+        args.logger.info(f"导入配餐计划的飞书接口调用指标: {lark_caller.summary()}")
 
     return {"message": "配餐计划生成成功"}
 
@@ -1 +1,8 @@
-from .meal_planner import generate_meal_plan
+from .meal_planner import generate_meal_plan, iter_meal_plan, PlannerModel
+from .state import PlannerState
+from .catalog import DishCatalog
+from .profiling import PlannerProfiler
+from .report import PlanReport, render_plan, render_day_report
+from .parallel import generate_best_plan
+from .batch import plan_canteens
+from .anytime import generate_meal_plan_within_budget, plan_within_budget
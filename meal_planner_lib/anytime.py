@@ -0,0 +1,125 @@
+import time
+
+from .meal_planner import PlannerModel
+from .meal_planner import describe_seed, make_seed_sequence
+from .compliance import evaluate_plan, compliance_key
+
+
+def plan_within_budget(
+    model, sys_config, time_budget_ms, seed=None, score_mode="vector", reseed_share=0.5
+):
+    """
+    在时间预算内生成排餐方案（随时可返回的改进模式）
+
+    先用贪心算法快速生成一个方案，再用剩余时间改进：前一部分时间（reseed_share）以新的随机子流
+    重新生成并保留达标情况最好的方案，之后对最好的方案进行局部搜索修复。每一步开始前都会
+    根据已用时间判断能否在截止时间前完成，因此除第一个贪心方案本身超时外，都在预算内返回。
+    重新生成或修复失败（如随机出现的可用菜品不足）时保留已有的最好方案，只有第一个贪心方案
+    失败时才抛出异常。
+
+    Args:
+        model: PlannerModel
+        sys_config: 系统配置（求解方式固定为贪心，repair_iterations 默认不限）
+        time_budget_ms: 时间预算，单位毫秒
+        seed: 随机种子（见 make_rng），各次生成及修复使用其派生的独立子流
+        score_mode: 评分模式
+        reseed_share: 用于重新生成的时间占预算的比例，其余时间用于修复
+
+    Returns:
+        排餐方案结果字典，budget 字段记录预算、实际用时、候选方案数、失败的改进步骤数（failed）
+        以及首个方案与最终方案的达标情况
+    """
+    if time_budget_ms <= 0:
+        raise ValueError(f"时间预算异常：{time_budget_ms}（应为正数，单位毫秒）")
+    start = time.perf_counter()
+    budget = time_budget_ms / 1000
+    deadline = start + budget
+    seed = make_seed_sequence(seed)
+    sys_config = dict(sys_config, solver="greedy", repair=False)
+
+    # 贪心方案
+    best = model.plan(sys_config, seed=seed.spawn(1)[0], score_mode=score_mode)
+    best_compliance = initial = evaluate_plan(model, best, sys_config)
+    plan_time = time.perf_counter() - start
+    candidates = 1
+    failed = 0  # 失败的改进步骤数
+
+    # 重新生成：预计能在分配的时间内完成时才开始下一个
+    reseed_deadline = start + budget * reseed_share
+    while (
+        best_compliance["violation_days"] > 0
+        and time.perf_counter() + plan_time <= reseed_deadline
+    ):
+        try:
+            result = model.plan(
+                sys_config, seed=seed.spawn(1)[0], score_mode=score_mode
+            )
+        except ValueError:
+            # 可用菜品不足等随机出现的失败不影响已有的最好方案
+            failed += 1
+            continue
+        candidates += 1
+        compliance = evaluate_plan(model, result, sys_config)
+        if compliance_key(compliance) < compliance_key(best_compliance):
+            best, best_compliance = result, compliance
+
+    # 修复：用剩余时间（预留与一次重新检查相当的时间）
+    repair_stats = None
+    remaining = deadline - time.perf_counter() - plan_time * 0.5
+    if best_compliance["violation_days"] > 0 and remaining > 0:
+        repair_config = dict(
+            sys_config,
+            repair_time_limit=remaining,
+            repair_iterations=sys_config.get("repair_iterations", 10**9),
+        )
+        try:
+            repaired = model.repair(best, repair_config, seed=seed.spawn(1)[0])
+        except ValueError:
+            failed += 1
+        else:
+            repair_stats = repaired.pop("repair")
+            compliance = evaluate_plan(model, repaired, sys_config)
+            if compliance_key(compliance) <= compliance_key(best_compliance):
+                best, best_compliance = repaired, compliance
+
+    elapsed = time.perf_counter() - start
+    best["budget"] = {
+        "time_budget_ms": time_budget_ms,
+        "used_ms": round(elapsed * 1000, 1),
+        "used_ratio": round(elapsed / budget, 4),
+        "seed": describe_seed(seed),
+        "candidates": candidates,
+        "failed": failed,
+        "repair": repair_stats,
+        "initial": initial,
+        "final": best_compliance,
+        "improvement": {
+            "violation_days": initial["violation_days"]
+            - best_compliance["violation_days"],
+            "deviation": round(initial["deviation"] - best_compliance["deviation"], 6),
+        },
+    }
+    return best
+
+
+def generate_meal_plan_within_budget(
+    dishes,
+    meal_config,
+    nutrition_std,
+    sys_config,
+    meal_nutrition_std,
+    time_budget_ms=None,
+    score_mode="vector",
+    seed=None,
+):
+    """
+    在时间预算内生成排餐方案，见 plan_within_budget
+
+    time_budget_ms 为 None 时使用系统配置中的 time_budget_ms。
+    """
+    if time_budget_ms is None:
+        time_budget_ms = sys_config["time_budget_ms"]
+    model = PlannerModel(dishes, meal_config, nutrition_std, meal_nutrition_std)
+    return plan_within_budget(
+        model, sys_config, time_budget_ms, seed=seed, score_mode=score_mode
+    )
@@ -0,0 +1,86 @@
+from collections import deque
+import numpy as np
+
+
+def build_memberships(pools, n_dishes):
+    """
+    按全局菜品索引汇总菜品所在的候选池位置
+
+    Args:
+        pools: 候选菜品池列表（不受重复天数限制的槽位为 None）
+        n_dishes: 菜品总数
+
+    Returns:
+        (indptr, slots, rows)，按 CSR 格式存储：菜品 g 所在的槽位序号和池内行号为
+        slots[indptr[g]:indptr[g + 1]] 和 rows[indptr[g]:indptr[g + 1]]（按槽位序号排列）
+    """
+    gidx, slots, rows = [np.empty(0, dtype=np.int64)], [], []
+    for slot, pool in enumerate(pools):
+        if pool is None:
+            continue
+        gidx.append(pool.gidx)
+        slots.append(np.full(len(pool), slot, dtype=np.int32))
+        rows.append(np.arange(len(pool), dtype=np.int32))
+    gidx = np.concatenate(gidx)
+    order = np.argsort(gidx, kind="stable")
+    indptr = np.zeros(n_dishes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(gidx, minlength=n_dishes), out=indptr[1:])
+    return (
+        indptr,
+        np.concatenate(slots or [np.empty(0, dtype=np.int32)])[order],
+        np.concatenate(rows or [np.empty(0, dtype=np.int32)])[order],
+    )
+
+
+class AvailabilityIndex:
+    """
+    菜品可用性索引（菜品最小重复天数规则）
+
+    每个槽位维护一个布尔掩码。菜品被选中时从其所在的所有候选池中移出，并按冷却结束日期
+    进入释放队列；每天开始时只释放冷却已结束的菜品，因此每个槽位只需处理发生变化的菜品，
+    而无需逐一检查整个候选池。
+    """
+
+    def __init__(self, pools, memberships, min_repeat_days):
+        self.masks = [
+            None if pool is None else np.ones(len(pool), dtype=bool) for pool in pools
+        ]
+        self.indptr, self.slots, self.pool_rows = memberships
+        # 同一天内已选菜品不可再选，因此冷却期至少为1天
+        self.cooldown = max(int(min_repeat_days), 1)
+        # 释放队列：(释放日期, 菜品全局索引)，释放日期单调不减
+        self._releases = deque()
+
+    def release(self, day):
+        """释放冷却期在 day 当天或之前结束的菜品"""
+        releases = self._releases
+        while releases and releases[0][0] <= day:
+            _, g = releases.popleft()
+            for slot, row in self._members(g):
+                self.masks[slot][row] = True
+
+    def take(self, g, day):
+        """将菜品 g 标记为在 day 当天被选中"""
+        members = self._members(g)
+        if not members:
+            return
+        for slot, row in members:
+            self.masks[slot][row] = False
+        self._releases.append((day + self.cooldown, g))
+
+    def _members(self, g):
+        """菜品 g 所在的 [(槽位序号, 池内行号)]"""
+        start, end = self.indptr[g], self.indptr[g + 1]
+        return list(
+            zip(self.slots[start:end].tolist(), self.pool_rows[start:end].tolist())
+        )
+
+    def rows(self, slot):
+        """
+        返回槽位当前可用菜品在候选池中的行号数组（按行号升序）
+
+        直接扫描布尔掩码而不另外维护可用行号数组：返回的行号随后都要参与评分（代价与可用菜品数
+        成正比），扫描掩码的代价与之同阶且小得多；增量维护的数组在每次选中/释放时都要删除或插入
+        元素，并且为保持行号升序（同分取舍和抽样结果依赖此顺序）还需额外排序，并不更省。
+        """
+        return np.flatnonzero(self.masks[slot])
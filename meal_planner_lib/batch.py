@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .meal_planner import generate_meal_plan
+from .meal_planner import describe_seed, make_seed_sequence
+
+# 每个食堂输入包包含的数据（与 get_input_data 的返回值一致）
+INPUT_KEYS = [
+    "dishes",
+    "meal_config",
+    "nutrition_std",
+    "meal_nutrition_std",
+    "sys_config",
+]
+
+# 并行方式：进程池（默认）或线程池（在同一服务进程内并发，排餐函数可重入）
+EXECUTORS = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+
+
+def _plan_canteen(index, bundle, seed, score_mode):
+    """为单个食堂生成排餐方案，错误只影响该食堂"""
+    name = bundle.get("name", f"canteen-{index + 1}")
+    start = time.perf_counter()
+    try:
+        result = generate_meal_plan(
+            **{key: bundle[key] for key in INPUT_KEYS},
+            score_mode=score_mode,
+            seed=seed,
+        )
+    except Exception as e:
+        return {
+            "name": name,
+            "ok": False,
+            "seed": describe_seed(make_seed_sequence(seed)),
+            "error": f"{type(e).__name__}: {e}",
+            "elapsed": round(time.perf_counter() - start, 4),
+        }
+    return {
+        "name": name,
+        "ok": True,
+        "result": result,
+        "elapsed": round(time.perf_counter() - start, 4),
+    }
+
+
+def plan_canteens(
+    canteens, workers=None, score_mode="vector", seed=None, executor="process"
+):
+    """
+    批量为多个食堂生成排餐方案
+
+    Args:
+        canteens: 食堂输入包列表，每项包含 dishes、meal_config、nutrition_std、
+            meal_nutrition_std、sys_config，可选 name
+        workers: 并行数，默认为 CPU 核数；为 1 时在当前线程内顺序生成
+        score_mode: 评分模式
+        seed: 批量随机种子，各食堂使用其 SeedSequence.spawn 派生的独立子流；
+            输入包中给出 seed 的食堂使用自己的种子
+        executor: 并行方式，process（进程池）或 thread（线程池）
+
+    Returns:
+        批量结果字典：各食堂结果（按输入顺序）、成功/失败数量、总耗时及吞吐量
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f"未知的并行方式：{executor}，可选方式：process（进程池）或 thread（线程池）"
+        )
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(canteens) or 1))
+
+    seed = make_seed_sequence(seed)
+    seeds = [
+        bundle.get("seed", child)
+        for bundle, child in zip(canteens, seed.spawn(len(canteens)))
+    ]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = list(
+            map(
+                _plan_canteen,
+                range(len(canteens)),
+                canteens,
+                seeds,
+                [score_mode] * len(canteens),
+            )
+        )
+    else:
+        with EXECUTORS[executor](max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    _plan_canteen,
+                    range(len(canteens)),
+                    canteens,
+                    seeds,
+                    [score_mode] * len(canteens),
+                )
+            )
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(1 for item in results if item["ok"])
+    return {
+        "seed": describe_seed(seed),
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "workers": workers,
+        "executor": executor,
+        "elapsed": round(elapsed, 4),
+        "throughput": round(len(results) / elapsed, 4) if elapsed > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m meal_planner_lib", description="多食堂批量排餐"
+    )
+    parser.add_argument("input", help="食堂输入包列表（JSON 文件）")
+    parser.add_argument(
+        "-o", "--output", help="结果输出文件（JSON），默认输出到标准输出"
+    )
+    parser.add_argument("-w", "--workers", type=int, default=None, help="并行数")
+    parser.add_argument(
+        "--executor",
+        default="process",
+        choices=list(EXECUTORS),
+        help="并行方式：process（进程池）或 thread（线程池）",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="批量随机种子")
+    parser.add_argument(
+        "--score-mode", default="vector", choices=["vector", "scalar"], help="评分模式"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8") as f:
+        canteens = json.load(f)
+
+    batch = plan_canteens(
+        canteens,
+        workers=args.workers,
+        score_mode=args.score_mode,
+        seed=args.seed,
+        executor=args.executor,
+    )
+
+    for item in batch["results"]:
+        status = "✅" if item["ok"] else f"❌ {item['error']}"
+        print(f"{item['name']}: {item['elapsed']:.3f}s {status}", file=sys.stderr)
+    print(
+        f"共 {len(batch['results'])} 个食堂，成功 {batch['succeeded']}，失败 {batch['failed']}，"
+        f"总耗时 {batch['elapsed']:.3f}s，吞吐量 {batch['throughput']} 个/秒",
+        file=sys.stderr,
+    )
+
+    output = json.dumps(batch, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
@@ -0,0 +1,166 @@
+import numpy as np
+
+from .scoring import compute_scores, compute_total_weight
+
+
+class _Beam:
+    """一个部分完成的当日方案：累计得分、各槽位已选行号及当日营养/价格累计"""
+
+    __slots__ = ("score", "picks", "taken", "meal_nutrition", "day_nutrition", "price")
+
+    def __init__(self, score, picks, taken, meal_nutrition, day_nutrition, price):
+        self.score = score
+        self.picks = picks  # picks[槽位序号] 为已选菜品在候选池中的行号列表
+        self.taken = taken  # 当日已选的受重复天数限制的菜品全局索引
+        self.meal_nutrition = meal_nutrition  # {餐时段: 营养累计向量}
+        self.day_nutrition = day_nutrition
+        self.price = price
+
+    def extend(self, score, slot, meal_time, pool, row, is_staple):
+        picks = list(self.picks)
+        picks[slot] = picks[slot] + [row]
+        taken = self.taken if is_staple else self.taken | {int(pool.gidx[row])}
+        meal_nutrition = dict(self.meal_nutrition)
+        nutrition = pool.nutrition_of(row)
+        meal_nutrition[meal_time] = meal_nutrition[meal_time] + nutrition
+        return _Beam(
+            score,
+            picks,
+            taken,
+            meal_nutrition,
+            self.day_nutrition + nutrition,
+            self.price + pool.price_of(row),
+        )
+
+    def key(self):
+        """同一组菜品的不同选择顺序视为同一个部分方案"""
+        return tuple(tuple(sorted(rows)) for rows in self.picks)
+
+
+def _violations(beam, model, sys_config):
+    """完整当日方案超出营养素偏差比例和餐标浮动比例的项数"""
+    count = 0
+    deviations = sys_config["营养素偏差比例"]
+    for i, nutrient in enumerate(model.nutrients):
+        std_value = model.nutrition_std_dict.get(nutrient, 0)
+        if std_value <= 0:
+            continue
+        ratio = beam.day_nutrition[i] / std_value
+        deviation = deviations.get(nutrient, 0)
+        count += not (1 - deviation <= ratio <= 1 + deviation)
+    price_ratio = beam.price / sys_config["每日餐标(元)"]
+    price_deviation = sys_config["餐标浮动比例"]
+    count += not (1 - price_deviation <= price_ratio <= 1 + price_deviation)
+    return count
+
+
+def search_day(
+    model, day, last_used_arr, availability, total_nutrition, total_price, sys_config
+):
+    """
+    按槽位处理顺序（午餐 → 晚餐 → 早餐）对第 day 天做集束搜索
+
+    每选一道菜为一步：每个部分方案用 compute_scores 对其可用候选菜品一次性评分，
+    取前 beam_width 个扩展，再在所有扩展中保留累计得分最高的 beam_width 个部分方案。
+    单步评分次数与集束宽度成正比。完整方案中优先选择达标项最多的，其次为累计得分最高的。
+
+    Args:
+        model: PlannerModel
+        day: 当前天数索引（从0开始）
+        last_used_arr: 各菜品的最后使用日期数组
+        availability: 已释放到第 day 天的 AvailabilityIndex
+        total_nutrition: 整体营养累计 {营养素: 值}
+        total_price: 整体价格累计
+        sys_config: 系统配置（beam_width：集束宽度，默认8）
+
+    Returns:
+        picks 列表（picks[槽位序号] 为选中菜品在候选池中的行号列表）
+    """
+    width = int(sys_config.get("beam_width", 8))
+    if width < 1:
+        raise ValueError(f"集束宽度异常：{width}（应为正整数）")
+
+    total_weight = compute_total_weight(day, sys_config)
+    total_nutrition = np.array([total_nutrition[n] for n in model.nutrients])
+    zeros = np.zeros(len(model.nutrients))
+    beams = [
+        _Beam(
+            0.0,
+            [[] for _ in model.slots],
+            frozenset(),
+            {slot[0]: zeros for slot in model.slots},
+            zeros,
+            0.0,
+        )
+    ]
+    n_selected = 0
+
+    for slot, (meal_time, category, required_count, pool) in enumerate(model.slots):
+        is_staple = category == "主"
+        # 可用菜品：满足重复天数限制，主食不受此限制
+        base_rows = np.arange(len(pool)) if is_staple else availability.rows(slot)
+        if len(base_rows) < required_count:
+            raise ValueError(
+                f"Day {day + 1}, {meal_time}, {category}：可用菜品不足，请减少配餐天数和菜品数量！"
+            )
+        base_last_used = last_used_arr[pool.gidx[base_rows]]
+
+        for _ in range(required_count):
+            scores, parents, rows = [], [], []
+            for b, beam in enumerate(beams):
+                # 排除当日已选菜品（主食仅排除本槽位已选的）
+                mask = ~np.isin(base_rows, beam.picks[slot])
+                if not is_staple and beam.taken:
+                    mask &= ~np.isin(pool.gidx[base_rows], list(beam.taken))
+                candidate_rows = base_rows[mask]
+                if len(candidate_rows) == 0:
+                    continue
+                candidate_scores = compute_scores(
+                    pool,
+                    candidate_rows,
+                    day,
+                    base_last_used[mask],
+                    beam.meal_nutrition[meal_time],
+                    beam.day_nutrition,
+                    total_nutrition,
+                    beam.price,
+                    total_price,
+                    model.total_dishes_per_day - n_selected,
+                    total_weight,
+                    is_staple,
+                    sys_config,
+                )
+                if len(candidate_rows) > width:
+                    top = np.argpartition(-candidate_scores, width - 1)[:width]
+                else:
+                    top = np.arange(len(candidate_rows))
+                scores.append(beam.score + candidate_scores[top])
+                parents.append(np.full(len(top), b))
+                rows.append(candidate_rows[top])
+            if not scores:
+                raise ValueError(
+                    f"Day {day + 1}, {meal_time}, {category}：可用菜品不足，请减少配餐天数和菜品数量！"
+                )
+
+            scores = np.concatenate(scores)
+            parents = np.concatenate(parents)
+            rows = np.concatenate(rows)
+            next_beams, seen = [], set()
+            for i in np.argsort(-scores, kind="stable"):
+                beam = beams[parents[i]].extend(
+                    scores[i], slot, meal_time, pool, int(rows[i]), is_staple
+                )
+                key = beam.key()
+                if key in seen:
+                    continue
+                seen.add(key)
+                next_beams.append(beam)
+                if len(next_beams) == width:
+                    break
+            beams = next_beams
+            n_selected += 1
+
+    best = min(
+        beams, key=lambda beam: (_violations(beam, model, sys_config), -beam.score)
+    )
+    return best.picks
@@ -0,0 +1,176 @@
+import sys
+import numbers
+import numpy as np
+
+# 菜品字典中除营养素外的固定字段
+DISH_FIELDS = ["菜品ID", "菜品类别", "最终定价", "适用餐时段"]
+
+
+class DishCatalog:
+    """
+    按列存储的菜品目录
+
+    每道菜品对应一行：营养素矩阵（float32）、价格向量、菜品类别编码、适用餐时段位掩码，
+    菜品ID经 sys.intern 驻留并建立 ID -> 行号 的索引。与菜品字典列表相比内存小得多，
+    排餐模型可直接按行号读取各列，无需逐菜品查找字典。
+
+    可用 from_dicts / to_dicts 与菜品字典列表互相转换（只保留 DISH_FIELDS 和营养素字段）。
+    """
+
+    def __init__(
+        self,
+        ids,
+        nutrients,
+        nutrition,
+        price,
+        categories,
+        category_codes,
+        meal_times,
+        meal_mask,
+    ):
+        self.ids = ids  # 菜品ID列表
+        self.index = {dish_id: i for i, dish_id in enumerate(ids)}  # 菜品ID -> 行号
+        self.nutrients = nutrients  # 营养素名称（营养素矩阵的列顺序）
+        self.nutrition = nutrition  # 菜品×营养素 矩阵，float32
+        self.price = price  # 最终定价，float64
+        self.categories = categories  # 菜品类别名称
+        self.category_codes = category_codes  # 菜品类别在 categories 中的序号
+        self.meal_times = meal_times  # 餐时段名称（位掩码的位顺序）
+        self.meal_mask = meal_mask  # 适用餐时段位掩码
+
+    @classmethod
+    def from_dicts(cls, dishes, nutrients=None):
+        """
+        由菜品字典列表构建目录
+
+        Args:
+            dishes: 菜品字典列表（菜品ID重复时只保留第一个）
+            nutrients: 要保留的营养素列表，为 None 时保留菜品中出现的全部数值字段（最终定价除外），
+                菜品缺少的营养素按0计；指定时每道菜品都必须给出这些营养素的数值，否则抛出 ValueError
+
+        Returns:
+            DishCatalog
+        """
+        seen = set()
+        unique = []
+        for dish in dishes:
+            if dish["菜品ID"] not in seen:
+                seen.add(dish["菜品ID"])
+                unique.append(dish)
+
+        if nutrients is None:
+            nutrients = {}
+            for dish in unique:
+                for key, value in dish.items():
+                    if (
+                        key not in DISH_FIELDS
+                        and isinstance(value, numbers.Real)
+                        and not isinstance(value, bool)
+                    ):
+                        nutrients[key] = None
+        else:
+            # 缺少的营养素若按0计，会使排餐结果的营养累计值偏低而不报错，因此直接报错
+            for nutrient in nutrients:
+                missing = [
+                    dish["菜品ID"]
+                    for dish in unique
+                    if not isinstance(dish.get(nutrient), numbers.Real)
+                ]
+                if missing:
+                    raise ValueError(
+                        f"菜品数据异常：{len(missing)} 道菜品缺少营养素 {nutrient} 的数值"
+                        f"（如 {'、'.join(map(str, missing[:5]))}），请补全菜品营养数据！"
+                    )
+        nutrients = list(nutrients)
+
+        categories = {}
+        meal_times = {}
+        category_codes = np.empty(len(unique), dtype=np.int16)
+        meal_mask = np.zeros(len(unique), dtype=np.uint32)
+        for i, dish in enumerate(unique):
+            category_codes[i] = categories.setdefault(dish["菜品类别"], len(categories))
+            for meal_time in dish["适用餐时段"]:
+                meal_mask[i] |= 1 << meal_times.setdefault(meal_time, len(meal_times))
+        if len(meal_times) > 32:
+            raise ValueError(
+                f"餐时段数量异常：{len(meal_times)} 个（最多支持32个），请检查菜品的适用餐时段设置！"
+            )
+
+        return cls(
+            [
+                (
+                    sys.intern(dish["菜品ID"])
+                    if isinstance(dish["菜品ID"], str)
+                    else dish["菜品ID"]
+                )
+                for dish in unique
+            ],
+            nutrients,
+            np.array(
+                [[dish.get(n, 0) for n in nutrients] for dish in unique],
+                dtype=np.float32,
+            ).reshape(len(unique), len(nutrients)),
+            np.array([dish["最终定价"] for dish in unique], dtype=np.float64),
+            list(categories),
+            category_codes,
+            list(meal_times),
+            meal_mask,
+        )
+
+    def to_dicts(self):
+        """转换为菜品字典列表"""
+        # float32 按最短十进制表示还原，避免 0.1 还原为 0.10000000149011612
+        nutrition = [[float(str(v)) for v in row] for row in self.nutrition]
+        dishes = []
+        for i, dish_id in enumerate(self.ids):
+            dish = {
+                "菜品ID": dish_id,
+                "最终定价": self.price[i].item(),
+                "菜品类别": self.categories[self.category_codes[i]],
+                "适用餐时段": [
+                    meal_time
+                    for bit, meal_time in enumerate(self.meal_times)
+                    if self.meal_mask[i] >> bit & 1
+                ],
+            }
+            dish.update(zip(self.nutrients, nutrition[i]))
+            dishes.append(dish)
+        return dishes
+
+    def rows(self, meal_time, category):
+        """适用于该餐时段且属于该类别的菜品行号（按目录顺序）"""
+        if meal_time not in self.meal_times or category not in self.categories:
+            return np.empty(0, dtype=np.int64)
+        bit = np.uint32(1 << self.meal_times.index(meal_time))
+        return np.flatnonzero(
+            (self.meal_mask & bit).astype(bool)
+            & (self.category_codes == self.categories.index(category))
+        )
+
+    def nutrition_for(self, nutrients):
+        """
+        按给定营养素顺序取出 菜品×营养素 矩阵（float32，目录中没有的营养素抛出 ValueError）
+
+        营养素顺序与目录一致时直接返回目录的营养素矩阵（不复制），否则只复制所需的列。
+        """
+        missing = [n for n in nutrients if n not in self.nutrients]
+        if missing:
+            raise ValueError(
+                f"菜品数据异常：菜品目录中没有营养素 {'、'.join(missing)}，请补全菜品营养数据！"
+            )
+        if list(nutrients) == self.nutrients:
+            return self.nutrition
+        return self.nutrition[:, [self.nutrients.index(n) for n in nutrients]]
+
+    @property
+    def nbytes(self):
+        """各数组列占用的字节数"""
+        return (
+            self.nutrition.nbytes
+            + self.price.nbytes
+            + self.category_codes.nbytes
+            + self.meal_mask.nbytes
+        )
+
+    def __len__(self):
+        return len(self.ids)
@@ -0,0 +1,68 @@
+class ComplianceTracker:
+    """
+    逐天累计排餐方案的达标情况
+
+    只保存计数和总偏差，逐天生成时每天结束即可累计，无需保留完整方案。
+    """
+
+    def __init__(self, nutrition_std_dict, sys_config):
+        self.nutrition_std_dict = nutrition_std_dict
+        self.budget = sys_config["每日餐标(元)"]
+        self.price_deviation = sys_config["餐标浮动比例"]
+        self.nutrient_deviation = sys_config["营养素偏差比例"]
+        self.nutrient_violation_days = 0
+        self.price_violation_days = 0
+        self.violation_days = 0
+        self.deviation = 0.0
+
+    def add(self, day_nutrition, day_price):
+        """累计一天的营养合计 {营养素: 值} 和价格合计"""
+        nutrient_ok = True
+        for nutrient, std_value in self.nutrition_std_dict.items():
+            if std_value <= 0:
+                continue
+            ratio = day_nutrition.get(nutrient, 0.0) / std_value
+            band = self.nutrient_deviation.get(nutrient, 0)
+            self.deviation += abs(ratio - 1)
+            if not (1 - band <= ratio <= 1 + band):
+                nutrient_ok = False
+
+        price_ratio = day_price / self.budget
+        self.deviation += abs(price_ratio - 1)
+        price_ok = 1 - self.price_deviation <= price_ratio <= 1 + self.price_deviation
+
+        self.nutrient_violation_days += not nutrient_ok
+        self.price_violation_days += not price_ok
+        self.violation_days += not (nutrient_ok and price_ok)
+
+    def result(self):
+        """评估结果字典，排序键为 (不达标天数, 总偏差)，越小越好"""
+        return {
+            "violation_days": self.violation_days,
+            "nutrient_violation_days": self.nutrient_violation_days,
+            "price_violation_days": self.price_violation_days,
+            "deviation": round(self.deviation, 6),
+        }
+
+
+def evaluate_plan(model, result, sys_config):
+    """
+    按营养素偏差比例和餐标浮动比例评估排餐方案的达标情况
+
+    Args:
+        model: 生成该方案的 PlannerModel
+        result: 排餐方案结果字典
+        sys_config: 系统配置
+
+    Returns:
+        评估结果字典，排序键为 (不达标天数, 总偏差)，越小越好
+    """
+    tracker = ComplianceTracker(model.nutrition_std_dict, sys_config)
+    for daily_plan in result["meal_plan"]:
+        tracker.add(*model.day_totals(daily_plan))
+    return tracker.result()
+
+
+def compliance_key(compliance):
+    """排序键：先比较不达标天数，再比较总偏差"""
+    return (compliance["violation_days"], compliance["deviation"])
@@ -0,0 +1,226 @@
+import numpy as np
+
+from .scoring import NEVER_USED, LONG_UNUSED_DAYS, nutrient_weights
+
+try:
+    from scipy.optimize import milp, Bounds, LinearConstraint
+    from scipy.sparse import coo_matrix
+except ImportError:  # scipy 为可选依赖，仅精确求解模式需要
+    milp = None
+
+# 目标函数分两级：先只最小化超出允许范围的部分（每日约束重于每餐约束），找到全部达标的解即
+# 证明最优并停止；范围内的偏差和多样性奖励只作为次要偏好，在可选的优化阶段（milp_polish_time）
+# 中于不增加超出部分的前提下最小化
+DAY_SLACK_WEIGHT = 100.0
+MEAL_SLACK_WEIGHT = 10.0
+DAY_DEVIATION_WEIGHT = 1.0
+MEAL_DEVIATION_WEIGHT = 0.1
+# 多样性奖励（超过7天未使用/从未使用的菜品）
+DIVERSITY_WEIGHT = 0.01
+# 超出部分（加权）不超过该值时视为全部达标
+SLACK_TOLERANCE = 1e-6
+
+
+class _Program:
+    """按行累积稀疏约束矩阵的混合整数规划（cost 为超出部分的惩罚，tie_cost 为次要偏好）"""
+
+    def __init__(self):
+        self.cost = []
+        self.tie_cost = []
+        self.slack = []  # 超出部分变量
+        self.lower = []
+        self.upper = []
+        self.integrality = []
+        self.rows = []
+        self.cols = []
+        self.vals = []
+        self.row_lower = []
+        self.row_upper = []
+
+    def add_vars(self, n, tie_cost=0.0, upper=np.inf, integral=False):
+        start = len(self.cost)
+        self.cost.extend([0.0] * n)
+        self.tie_cost.extend(np.broadcast_to(tie_cost, (n,)).tolist())
+        self.lower.extend([0.0] * n)
+        self.upper.extend([upper] * n)
+        self.integrality.extend([int(integral)] * n)
+        return np.arange(start, start + n)
+
+    def add_row(self, cols, vals, lower, upper):
+        row = len(self.row_lower)
+        self.rows.extend([row] * len(cols))
+        self.cols.extend(cols)
+        self.vals.extend(vals)
+        self.row_lower.append(lower)
+        self.row_upper.append(upper)
+
+    def add_band(self, cols, vals, band, deviation_weight, slack_weight):
+        """约束 sum(vals * x) 相对标准值 1 的偏差：超出 ±band 的部分按 slack_weight 惩罚，偏差计入次要偏好"""
+        over, under, over_slack, under_slack = self.add_vars(4)
+        self.tie_cost[over] = self.tie_cost[under] = deviation_weight
+        self.cost[over_slack] = self.cost[under_slack] = slack_weight
+        self.slack.extend([over_slack, under_slack])
+        self.add_row(list(cols) + [over, under], list(vals) + [-1.0, 1.0], 1.0, 1.0)
+        self.add_row([over, over_slack], [1.0, -1.0], -np.inf, band)
+        self.add_row([under, under_slack], [1.0, -1.0], -np.inf, band)
+
+    def solve(self, cost, time_limit, rel_gap, upper=None):
+        n_rows = len(self.row_lower)
+        matrix = coo_matrix(
+            (self.vals, (self.rows, self.cols)), shape=(n_rows, len(self.cost))
+        ).tocsr()
+        return milp(
+            np.array(cost),
+            integrality=np.array(self.integrality),
+            bounds=Bounds(
+                np.array(self.lower),
+                np.array(self.upper) if upper is None else upper,
+            ),
+            constraints=LinearConstraint(
+                matrix, np.array(self.row_lower), np.array(self.row_upper)
+            ),
+            options={"time_limit": time_limit, "mip_rel_gap": rel_gap, "disp": False},
+        )
+
+
+def solve_days(model, day, n_days, last_used_arr, sys_config):
+    """
+    将第 day ~ day+n_days-1 天的配餐作为一个混合整数规划精确求解
+
+    变量为各天各槽位的可用候选菜品；约束包括每个槽位的菜品数量、菜品最小重复天数（含块内各天之间），
+    以及每日/每餐营养素偏差比例和每日餐标浮动比例（作为带惩罚的软约束，保证总有解）。
+
+    Args:
+        model: PlannerModel
+        day: 起始天数索引（从0开始）
+        n_days: 求解的天数
+        last_used_arr: 求解前各菜品的最后使用日期数组
+        sys_config: 系统配置（milp_time_limit：每次求解的时限，单位秒，默认5；
+            milp_rel_gap：可接受的相对最优间隙，默认0.05；milp_polish_time：在不增加超出部分的
+            前提下优化范围内偏差和多样性的时限，单位秒，默认0即不优化）
+
+    Returns:
+        每天的 picks 列表（picks[槽位序号] 为选中菜品在候选池中的行号列表）；
+        在时限内未得到可行解，或得到的解仍有超出允许范围的部分但未能证明最优时返回 None
+    """
+    if milp is None:
+        raise ValueError(
+            "精确求解模式需要安装 scipy（>=1.9），请安装后重试或改用贪心算法！"
+        )
+
+    cooldown = max(int(sys_config["菜品最小重复天数"]), 1)
+    budget = sys_config["每日餐标(元)"]
+    deviations = sys_config["营养素偏差比例"]
+    weights = nutrient_weights(model.nutrients, sys_config)
+    nutrients = [
+        (i, n)
+        for i, n in enumerate(model.nutrients)
+        if model.nutrition_std_dict.get(n, 0) > 0
+    ]
+
+    program = _Program()
+    dish_cols = []  # 菜品变量的 (变量, 天, 槽位, 行号)
+    dish_vars = {}  # 受重复天数限制的菜品 -> [(天, 变量)]
+
+    for t in range(n_days):
+        day_cols, day_nutrition, day_price = [], [], []
+        meal_cols = {}
+        for slot, (meal_time, category, required_count, pool) in enumerate(model.slots):
+            last_used = last_used_arr[pool.gidx]
+            if category == "主":
+                rows = np.arange(len(pool))
+            else:
+                rows = np.flatnonzero(last_used + cooldown <= day + t)
+            if len(rows) < required_count:
+                return None
+
+            # 多样性奖励：超过7天未使用/从未使用的菜品
+            long_unused = (last_used[rows] == NEVER_USED) | (
+                day + t - last_used[rows] > LONG_UNUSED_DAYS
+            )
+            cols = program.add_vars(
+                len(rows),
+                tie_cost=-DIVERSITY_WEIGHT * 0.2 * long_unused,
+                upper=1.0,
+                integral=True,
+            )
+            program.add_row(cols, [1.0] * len(cols), required_count, required_count)
+            dish_cols.extend(
+                (col, t, slot, row) for col, row in zip(cols.tolist(), rows.tolist())
+            )
+            if category != "主":
+                for col, g in zip(cols.tolist(), pool.gidx[rows].tolist()):
+                    dish_vars.setdefault(g, []).append((t, col))
+
+            day_cols.append(cols)
+            day_nutrition.append(pool.nutrition_of(rows))
+            day_price.append(pool.price_of(rows))
+            meal_cols.setdefault(meal_time, []).append((cols, pool, rows))
+
+        day_cols = np.concatenate(day_cols)
+        day_nutrition = np.concatenate(day_nutrition)
+
+        # 每日营养素偏差比例
+        for i, n in nutrients:
+            program.add_band(
+                day_cols,
+                day_nutrition[:, i] / model.nutrition_std_dict[n],
+                deviations.get(n, 0),
+                DAY_DEVIATION_WEIGHT * weights[i],
+                DAY_SLACK_WEIGHT * weights[i],
+            )
+        # 每日餐标浮动比例
+        program.add_band(
+            day_cols,
+            np.concatenate(day_price) / budget,
+            sys_config["餐标浮动比例"],
+            DAY_DEVIATION_WEIGHT,
+            DAY_SLACK_WEIGHT,
+        )
+        # 每餐营养素偏差比例
+        for meal_time, parts in meal_cols.items():
+            meal_std = model.meal_nutrition_std_dict[meal_time]
+            cols = np.concatenate([part[0] for part in parts])
+            for i, n in enumerate(model.nutrients):
+                if meal_std.get(n, 0) <= 0:
+                    continue
+                vals = np.concatenate(
+                    [pool.nutrition_of(rows)[:, i] for _, pool, rows in parts]
+                )
+                program.add_band(
+                    cols,
+                    vals / meal_std[n],
+                    deviations.get(n, 0),
+                    MEAL_DEVIATION_WEIGHT * weights[i],
+                    MEAL_SLACK_WEIGHT * weights[i],
+                )
+
+    # 菜品最小重复天数：任意连续 cooldown 天内同一菜品至多出现一次（含同一天的不同槽位）
+    for occurrences in dish_vars.values():
+        for start in range(n_days):
+            cols = [col for t, col in occurrences if start <= t < start + cooldown]
+            if len(cols) > 1:
+                program.add_row(cols, [1.0] * len(cols), 0, 1)
+
+    rel_gap = sys_config.get("milp_rel_gap", 0.05)
+    result = program.solve(program.cost, sys_config.get("milp_time_limit", 5), rel_gap)
+    if result.x is None:
+        return None
+    # 时限内停止的解未经证明，仍有超出部分时不采用（由调用方回退为贪心算法并给出提示）
+    if result.status != 0 and result.fun > SLACK_TOLERANCE:
+        return None
+
+    polish_time = sys_config.get("milp_polish_time", 0)
+    if polish_time > 0:
+        # 各超出部分不大于已得到的解，在此范围内优化次要偏好
+        upper = np.array(program.upper)
+        upper[program.slack] = result.x[program.slack] + SLACK_TOLERANCE
+        polished = program.solve(program.tie_cost, polish_time, rel_gap, upper=upper)
+        if polished.x is not None:
+            result = polished
+
+    picks = [[[] for _ in model.slots] for _ in range(n_days)]
+    for col, t, slot, row in dish_cols:
+        if result.x[col] > 0.5:
+            picks[t][slot].append(row)
+    return picks
@@ -1,426 +1,823 @@
+import copy
 import json
-import math
 import numpy as np
 from collections import defaultdict
 from .example_data import *
+from .scoring import NEVER_USED, CandidatePool
+from .scoring import compute_score, compute_scores, compute_total_weight
+from .scoring import gumbel_top_k, top_k_indices, usage_window
+from .availability import AvailabilityIndex, build_memberships
+from .state import PlannerState
 from .warning_handler import WarningCollector
+from .catalog import DishCatalog
+from .exact import solve_days
+from .beam import search_day
+from .repair import repair_plan
+from .profiling import make_profiler
+from .compliance import ComplianceTracker
+from .report import PlanReport, render_plan
+
+# 餐时段处理顺序（重要的餐时段优先处理）
+MEAL_TIME_ORDER = ["午餐", "晚餐", "早餐"]
+
+# 可选的求解方式
+SOLVERS = ["greedy", "beam", "milp"]
+
+# 餐时段内菜品类别处理顺序：荤、素、主，然后是其余类别
+CATEGORY_ORDER = {"荤": 0, "素": 1, "主": 2}
+
+
+def make_rng(seed=None):
+    """
+    构建本次配餐使用的独立随机数流
+
+    Args:
+        seed: None（随机熵）、整数、np.random.SeedSequence、describe_seed 返回的字典，
+            或直接传入 np.random.Generator
+
+    Returns:
+        (np.random.Generator, 可用于复现的种子描述；传入 Generator 时为 None)
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed, None
+    seed_seq = make_seed_sequence(seed)
+    return np.random.default_rng(seed_seq), describe_seed(seed_seq)
+
+
+def make_seed_sequence(seed=None):
+    """将 None、整数、describe_seed 返回的字典或 SeedSequence 统一转为 SeedSequence"""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, dict):
+        return np.random.SeedSequence(
+            seed["entropy"], spawn_key=tuple(seed.get("spawn_key", ()))
+        )
+    return np.random.SeedSequence(seed)
+
+
+def describe_seed(seed_seq):
+    """将 SeedSequence 描述为可 JSON 序列化、可传回 make_rng 的种子"""
+    if seed_seq.spawn_key:
+        return {"entropy": seed_seq.entropy, "spawn_key": list(seed_seq.spawn_key)}
+    return seed_seq.entropy
+
+
+class PlannerModel:
+    """
+    编译后的排餐模型
+
+    由 (菜品, 餐类配置, 每日营养标准, 每餐营养标准) 构建一次，预处理营养标准、
+    按处理顺序展开的槽位表及每个槽位的候选菜品池，之后可多次调用 plan 生成不同
+    系统配置（餐标、天数、权重等）下的排餐方案。
+
+    模型构建后只读：随机数流、排餐进度和警告都保存在每次调用各自的 PlannerState 中，
+    因此同一个模型可在多个线程中并发调用 plan 等方法。
+    """
+
+    def __init__(self, dishes, meal_config, nutrition_std, meal_nutrition_std):
+        # 预处理每餐营养标准
+        meal_nutrition_std_dict = defaultdict(dict)
+        for item in meal_nutrition_std:
+            meal_nutrition_std_dict[item["餐时段"]][item["营养素名称"]] = item["标准值"]
+
+        # 预处理数据结构
+        nutrition_std_dict = {
+            item["营养素名称"]: item["标准值"] for item in nutrition_std
+        }
+        meal_time_configs = defaultdict(list)
+        for mc in meal_config:
+            meal_time_configs[mc["餐时段"]].append((mc["菜品类别"], mc["数量"]))
+
+        # 检查每个餐时段的菜品数量
+        for meal_time, categories in meal_time_configs.items():
+            total_dishes = sum(count for (_, count) in categories)
+            if total_dishes <= 0:
+                # 如果该餐时段没有菜品，则从每日营养标准中减去该餐时段的营养标准
+                for nutrient, value in meal_nutrition_std_dict[meal_time].items():
+                    nutrition_std_dict[nutrient] -= value
+                    if nutrition_std_dict[nutrient] < 0:
+                        raise ValueError(
+                            f"营养标准异常：{nutrient} 计算值为 {nutrition_std_dict[nutrient]}（应为正数），请检查 {meal_time} 时段的营养标准设置！"
+                        )
 
+        # 参与累计和评分的营养素：每日营养标准中列出的全部营养素
+        nutrients = list(nutrition_std_dict)
 
-warnings = WarningCollector()
-
-
-def generate_meal_plan(
-    dishes, meal_config, nutrition_std, sys_config, meal_nutrition_std
-):
-    # 预处理每餐营养标准
-    meal_nutrition_std_dict = defaultdict(dict)
-    for item in meal_nutrition_std:
-        meal_nutrition_std_dict[item["餐时段"]][item["营养素名称"]] = item["标准值"]
-
-    # 预处理数据结构
-    nutrition_std_dict = {item["营养素名称"]: item["标准值"] for item in nutrition_std}
-    meal_time_configs = defaultdict(list)
-    for mc in meal_config:
-        meal_time_configs[mc["餐时段"]].append((mc["菜品类别"], mc["数量"]))
-
-    # 检查每个餐时段的菜品数量
-    for meal_time, categories in meal_time_configs.items():
-        total_dishes = sum(count for (_, count) in categories)
-        if total_dishes <= 0:
-            # 如果该餐时段没有菜品，则从每日营养标准中减去该餐时段的营养标准
-            for nutrient, value in meal_nutrition_std_dict[meal_time].items():
-                nutrition_std_dict[nutrient] -= value
-                if nutrition_std_dict[nutrient] < 0:
-                    raise ValueError(
-                        f"营养标准异常：{nutrient} 计算值为 {nutrition_std_dict[nutrient]}（应为正数），请检查 {meal_time} 时段的营养标准设置！"
-                    )
-
-    # 构建菜品映射：{餐时段: {类别: [菜品]}}
-    dish_map = defaultdict(lambda: defaultdict(list))
-    for dish in dishes:
-        for meal_time in dish["适用餐时段"]:  # 适用餐时段为空时，默认菜品无效
-            dish_map[meal_time][dish["菜品类别"]].append(dish)
-
-    # 计算每日总菜品数
-    total_dishes_per_day = sum(
-        count for meal in meal_time_configs.values() for (_, count) in meal
-    )
-    avg_price_per_dish = sys_config["每日餐标(元)"] / total_dishes_per_day
-
-    # 记录菜品最后使用日期
-    last_used = {}
-    meal_plan = []
-
-    # 记录整体营养和价格
-    total_nutrition = defaultdict(float)
-    total_price = 0.0
-
-    for day in range(sys_config["配餐天数"]):
-        daily_plan = {"day": day + 1, "meals": defaultdict(list)}
-        selected_dishes = set()
-        current_day_nutrition = defaultdict(float)  # 存储每日总营养
-        current_meal_nutrition = defaultdict(lambda: defaultdict(float))  # 存储每餐营养
-        current_day_price = 0.0
+        # 按列存储的菜品目录，行号即菜品全局索引（用于最后使用日期数组和可用性索引）
+        if isinstance(dishes, DishCatalog):
+            catalog = dishes
+        else:
+            catalog = DishCatalog.from_dicts(dishes, nutrients)
+        nutrition = catalog.nutrition_for(nutrients)
 
-        # 按餐时段顺序处理（重要的餐时段优先处理）
-        for meal_time in ["午餐", "晚餐", "早餐"]:
+        # 按处理顺序展开槽位表：[(餐时段, 类别, 数量, 候选菜品池)]
+        slots = []
+        for meal_time in MEAL_TIME_ORDER:
             if meal_time not in meal_time_configs:
                 continue
-
-            # 按特定顺序排序：荤、素、主，然后是其余类别
-            category_order = {"荤": 0, "素": 1, "主": 2}
-            meal_time_configs[meal_time].sort(key=lambda x: category_order.get(x[0], 3))
-
-            # 处理当前餐时段的每个类别需求
-            for category, required_count in meal_time_configs[meal_time]:
+            categories = sorted(
+                meal_time_configs[meal_time],
+                key=lambda x: CATEGORY_ORDER.get(x[0], 3),
+            )
+            for category, required_count in categories:
                 if required_count <= 0:
                     continue
+                # 适用餐时段为空时，默认菜品无效
+                pool = CandidatePool(
+                    catalog.rows(meal_time, category),
+                    nutrition,
+                    catalog.price,
+                    meal_nutrition_std_dict[meal_time],
+                    nutrition_std_dict,
+                    nutrients,
+                )
+                slots.append((meal_time, category, required_count, pool))
+
+        self.meal_nutrition_std_dict = meal_nutrition_std_dict
+        self.nutrition_std_dict = nutrition_std_dict
+        self.catalog = catalog
+        self.dish_index = catalog.index
+        self.nutrients = nutrients
+        # 按全局索引排列的 菜品×营养素 矩阵（float32，与菜品目录共用，累计时按 float64 相加）和价格
+        self.nutrition = nutrition
+        self.price = catalog.price
+        self.slots = slots
+        # 菜品所在的受重复天数限制的候选池位置（主食不受此限制）
+        self.memberships = build_memberships(
+            [None if slot[1] == "主" else slot[3] for slot in slots], len(catalog)
+        )
+        # 计算每日总菜品数
+        self.total_dishes_per_day = sum(
+            count for meal in meal_time_configs.values() for (_, count) in meal
+        )
 
-                candidates = dish_map[meal_time][category]
-
-                # 筛选可用菜品：未被选中且满足重复天数限制，主食不受此限制
-                available = []
+    def plan(
+        self, sys_config, seed=None, score_mode="vector", checkpoint=None, profile=None
+    ):
+        """
+        生成排餐方案
+
+        Args:
+            sys_config: 系统配置（repair 为 True 时，生成后对不达标的天进行局部搜索修复，
+                见 repair_plan；修复统计回显在结果的 repair 字段）
+            seed: 随机种子（见 make_rng），为 None 时使用随机熵，实际种子回显在结果的 seed 字段
+            score_mode: 评分模式，vector（向量化，默认）或 scalar（逐菜品计算，作为参考实现）
+            checkpoint: 每天结束后调用的回调 checkpoint(state)，可调用 state.to_dict() 保存快照
+            profile: 分阶段计时（见 make_profiler）：True、PlannerProfiler 或每天结束后调用的
+                回调函数；开启时结果中附加 timings 字段
+
+        Returns:
+            排餐方案结果字典
+        """
+        rng, seed = make_rng(seed)
+        return self._run(
+            PlannerState(seed, rng),
+            sys_config,
+            score_mode,
+            checkpoint,
+            make_profiler(profile),
+        )
 
-                if category == "主":
-                    available = candidates
-                else:
-                    for dish in candidates:
-                        dish_id = dish["菜品ID"]
-                        if dish_id in selected_dishes:
-                            continue
-                        last_day = last_used.get(
-                            dish_id, -sys_config["菜品最小重复天数"] - 1
-                        )
-                        if (day - last_day) >= sys_config["菜品最小重复天数"]:
-                            available.append(dish)
+    def resume(
+        self, state, sys_config, score_mode="vector", checkpoint=None, profile=None
+    ):
+        """
+        从排餐进度快照继续生成剩余天数的排餐方案
+
+        快照中保存了随机数流状态，因此续排结果与不中断时生成的结果一致。
+
+        Args:
+            state: PlannerState 或其 to_dict() 快照（不会被修改）
+            sys_config, score_mode, checkpoint, profile: 同 plan
+
+        Returns:
+            排餐方案结果字典
+        """
+        if isinstance(state, PlannerState):
+            state = state.to_dict()
+        return self._run(
+            PlannerState.from_dict(state),
+            sys_config,
+            score_mode,
+            checkpoint,
+            make_profiler(profile),
+        )
 
-                if len(available) < required_count:
-                    raise ValueError(
-                        f"Day {day + 1}, {meal_time}, {category}：可用菜品不足，请减少配餐天数和菜品数量！"
-                    )
+    def replan_from(
+        self,
+        result,
+        from_day,
+        sys_config,
+        seed=None,
+        score_mode="vector",
+        checkpoint=None,
+        profile=None,
+    ):
+        """
+        保留已有方案的第 1 ~ from_day-1 天，仅重新生成第 from_day 天及之后的方案
+
+        Args:
+            result: 已有的排餐方案结果字典
+            from_day: 开始重新生成的天数（从1开始）
+            sys_config, seed, score_mode, checkpoint, profile: 同 plan
+
+        Returns:
+            排餐方案结果字典
+        """
+        if not 1 <= from_day <= len(result["meal_plan"]) + 1:
+            raise ValueError(
+                f"重排起始天数异常：{from_day}（应在 1 ~ {len(result['meal_plan']) + 1} 之间）"
+            )
+        state = self.state_from_plan(result["meal_plan"][: from_day - 1], seed)
+        return self._run(
+            state, sys_config, score_mode, checkpoint, make_profiler(profile)
+        )
 
-                # 动态计算当前已选部分的营养和价格
-                def compute_score(
-                    dish,
-                    meal_time,
-                    current_day_nutrition,
-                    meal_nutrition_std_dict,
-                    total_nutrition,
-                    total_price,
-                ):
-                    # 获取当前餐时段的营养标准
-                    meal_nutrition_std = meal_nutrition_std_dict[meal_time]
-
-                    # 计算当前餐时段的营养得分
-                    e_meal = (
-                        current_meal_nutrition[meal_time]["能量(Kcal)"]
-                        + dish["能量(Kcal)"]
-                    ) / meal_nutrition_std["能量(Kcal)"]
-                    p_meal = (
-                        current_meal_nutrition[meal_time]["蛋白质(g)"]
-                        + dish["蛋白质(g)"]
-                    ) / meal_nutrition_std["蛋白质(g)"]
-                    f_meal = (
-                        current_meal_nutrition[meal_time]["脂肪(g)"] + dish["脂肪(g)"]
-                    ) / meal_nutrition_std["脂肪(g)"]
-                    c_meal = (
-                        current_meal_nutrition[meal_time]["碳水化合物(g)"]
-                        + dish["碳水化合物(g)"]
-                    ) / meal_nutrition_std["碳水化合物(g)"]
-                    nutri_score_meal = (
-                        1
-                        - abs(e_meal - 1)
-                        + 1
-                        - abs(p_meal - 1)
-                        + 1
-                        - abs(f_meal - 1)
-                        + 1
-                        - abs(c_meal - 1)
-                    ) / 4
-
-                    # 计算每日营养得分
-                    e_day = (
-                        current_day_nutrition["能量(Kcal)"] + dish["能量(Kcal)"]
-                    ) / nutrition_std_dict["能量(Kcal)"]
-                    p_day = (
-                        current_day_nutrition["蛋白质(g)"] + dish["蛋白质(g)"]
-                    ) / nutrition_std_dict["蛋白质(g)"]
-                    f_day = (
-                        current_day_nutrition["脂肪(g)"] + dish["脂肪(g)"]
-                    ) / nutrition_std_dict["脂肪(g)"]
-                    c_day = (
-                        current_day_nutrition["碳水化合物(g)"] + dish["碳水化合物(g)"]
-                    ) / nutrition_std_dict["碳水化合物(g)"]
-                    nutri_score_day = (
-                        1
-                        - abs(e_day - 1)
-                        + 1
-                        - abs(p_day - 1)
-                        + 1
-                        - abs(f_day - 1)
-                        + 1
-                        - abs(c_day - 1)
-                    ) / 4
-
-                    # 计算整体营养得分
-                    e_total = (total_nutrition["能量(Kcal)"] + dish["能量(Kcal)"]) / (
-                        nutrition_std_dict["能量(Kcal)"] * sys_config["配餐天数"]
-                    )
-                    p_total = (total_nutrition["蛋白质(g)"] + dish["蛋白质(g)"]) / (
-                        nutrition_std_dict["蛋白质(g)"] * sys_config["配餐天数"]
-                    )
-                    f_total = (total_nutrition["脂肪(g)"] + dish["脂肪(g)"]) / (
-                        nutrition_std_dict["脂肪(g)"] * sys_config["配餐天数"]
-                    )
-                    c_total = (
-                        total_nutrition["碳水化合物(g)"] + dish["碳水化合物(g)"]
-                    ) / (nutrition_std_dict["碳水化合物(g)"] * sys_config["配餐天数"])
-                    nutri_score_total = (
-                        1
-                        - abs(e_total - 1)
-                        + 1
-                        - abs(p_total - 1)
-                        + 1
-                        - abs(f_total - 1)
-                        + 1
-                        - abs(c_total - 1)
-                    ) / 4
-
-                    # 计算每日菜品动态均价得分
-                    remaining_dishes = total_dishes_per_day - len(selected_dishes)
-                    remaining_budget = sys_config["每日餐标(元)"] - current_day_price
-                    # 如果剩余预算不足，则强制设置为0.01元，这样低价菜品在后续配餐中更容易被选中
-                    if remaining_budget <= 0:
-                        remaining_budget = 0.01
-                    dynamic_avg = remaining_budget / remaining_dishes
-                    price_ratio_dynamic = dish["最终定价"] / dynamic_avg
-                    price_score_dynamic = 1 - abs(price_ratio_dynamic - 1)
-
-                    # 计算每日价格得分
-                    new_price_day = current_day_price + dish["最终定价"]
-                    price_ratio_day = new_price_day / sys_config["每日餐标(元)"]
-                    price_score_day = 1 - abs(price_ratio_day - 1)
-
-                    # 混合每日价格得分
-                    price_score_day = (price_score_day + price_score_dynamic) / 2
-
-                    # 计算整体价格得分
-                    new_price_total = total_price + dish["最终定价"]
-                    price_ratio_total = new_price_total / (
-                        sys_config["每日餐标(元)"] * sys_config["配餐天数"]
-                    )
-                    price_score_total = 1 - abs(price_ratio_total - 1)
+    def state_from_plan(self, meal_plan, seed=None):
+        """
+        由已确定的若干天方案重建排餐进度快照
+
+        Args:
+            meal_plan: 已确定的每日方案列表（第1天起连续若干天）
+            seed: 后续天数使用的随机种子（见 make_rng）
+
+        Returns:
+            PlannerState
+        """
+        rng, seed = make_rng(seed)
+        state = PlannerState(seed, rng)
+        for daily_plan in meal_plan:
+            for meal_dishes in daily_plan["meals"].values():
+                for item in meal_dishes:
+                    state.last_used[item["菜品ID"]] = state.day
+            day_nutrition, day_price = self.day_totals(daily_plan)
+            state.total_price += day_price
+            for nutrient in day_nutrition:
+                state.total_nutrition[nutrient] += day_nutrition[nutrient]
+            state.meal_plan.append(copy.deepcopy(daily_plan))
+            state.day += 1
+        return state
+
+    def iter_plan(
+        self,
+        sys_config,
+        seed=None,
+        score_mode="vector",
+        checkpoint=None,
+        profile=None,
+        state=None,
+    ):
+        """
+        逐天生成排餐方案的生成器：每天结束即产出当天方案，最后产出平均每日指标
+
+        每日方案附带当天的数值报告（report 字段，见 PlanReport.day_dict），对比字符串可由
+        render_day_report 按需生成。结果中不保留每日方案，因此 summary 中 report 的逐天数据为空，
+        只有平均每日指标。
+
+        已产出的每日方案不会在内部保留，排餐进度中只有固定大小的累计值和滚动窗口内的菜品使用
+        记录，因此每天的耗时和内存不随天数增长，适合生成一学期或一整年的方案：调用方可边生成
+        边写出，checkpoint 保存的快照大小也不随天数增长。
+
+        Args:
+            sys_config, seed, score_mode, checkpoint, profile: 同 plan
+            state: 从该排餐进度快照（PlannerState 或其 to_dict()）继续生成，此时忽略 seed
+
+        Yields:
+            ("day", 含 report 字段的每日方案)，……，最后为 ("summary", 不含 meal_plan 的结果字典，
+            compliance 字段为本次产出各天的达标情况，见 evaluate_plan)
+        """
+        profiler = make_profiler(profile)
+        if state is None:
+            rng, seed = make_rng(seed)
+            state = PlannerState(seed, rng)
+        else:
+            if isinstance(state, PlannerState):
+                state = state.to_dict()
+            state = PlannerState.from_dict(state)
+        compliance = ComplianceTracker(self.nutrition_std_dict, sys_config)
+        for daily_plan in self._iter_days(
+            state, sys_config, score_mode, profiler=profiler
+        ):
+            report = self.report([daily_plan], sys_config)
+            daily_plan["report"] = report.day_dict(0)
+            compliance.add(
+                dict(zip(self.nutrients, report.actual[0].tolist())),
+                float(report.price[0]),
+            )
+            if checkpoint is not None:
+                checkpoint(state)
+            yield "day", daily_plan
+        if profiler is not None:
+            profiler.mark()
+        summary = self._summarize(state, sys_config, profiler)
+        del summary["meal_plan"]
+        summary["compliance"] = compliance.result()
+        yield "summary", summary
+
+    def _run(self, state, sys_config, score_mode, checkpoint, profiler=None):
+        repair = sys_config.get("repair", False)
+        for daily_plan in self._iter_days(
+            state, sys_config, score_mode, profiler=profiler
+        ):
+            state.meal_plan.append(daily_plan)
+            if checkpoint is not None:
+                checkpoint(state)
+        if profiler is not None:
+            profiler.mark()
+        if not repair:
+            return self._summarize(state, sys_config, profiler)
+        return self._repair(state, sys_config, profiler)
+
+    def repair(self, result, sys_config, seed=None):
+        """
+        对已有排餐方案中不达标的天进行局部搜索修复（见 repair_plan），不修改传入的方案
+
+        Args:
+            result: 已有的排餐方案结果字典
+            sys_config: 系统配置
+            seed: 修复使用的随机种子（见 make_rng）
+
+        Returns:
+            修复后的排餐方案结果字典（含 repair 统计字段）
+        """
+        state = self.state_from_plan(result["meal_plan"], seed)
+        # 保留原方案的警告
+        if "warning_details" in result:
+            state.warnings = WarningCollector.from_dict(result["warning_details"])
+        else:
+            for message in result.get("warnings", []):
+                state.warnings.add(message)
+        repaired = self._repair(state, sys_config)
+        # seed 字段保持为原方案的种子，修复使用的种子回显在 repair 字段中
+        repaired["repair"]["seed"] = repaired["seed"]
+        repaired["seed"] = result.get("seed")
+        return repaired
+
+    def _repair(self, state, sys_config, profiler=None):
+        """修复已完成的排餐进度，生成结果字典"""
+        repair_stats = repair_plan(self, state, sys_config)
+        if profiler is not None:
+            profiler.lap("repair")
+        result = self._summarize(state, sys_config, profiler)
+        result["repair"] = repair_stats
+        return result
+
+    def dish(self, g):
+        """全局索引为 g 的菜品（字典形式，供逐菜品评分等使用）"""
+        dish = {
+            "菜品ID": self.catalog.ids[g],
+            "菜品类别": self.catalog.categories[self.catalog.category_codes[g]],
+            "最终定价": self.price[g].item(),
+        }
+        dish.update(zip(self.nutrients, self.nutrition[g].tolist()))
+        return dish
+
+    def day_totals(self, daily_plan):
+        """按每日方案中的菜品重新计算当天营养和价格合计"""
+        day_nutrition = np.zeros(len(self.nutrients))
+        day_price = 0.0
+        for meal_dishes in daily_plan["meals"].values():
+            for item in meal_dishes:
+                g = self.dish_index[item["菜品ID"]]
+                day_price += self.price[g].item()
+                day_nutrition += self.nutrition[g]
+        return dict(zip(self.nutrients, day_nutrition.tolist())), day_price
+
+    def plan_totals(self, meal_plan):
+        """
+        向量化计算多天方案的每日营养和价格合计
+
+        Returns:
+            (天×营养素 矩阵, 每日价格数组)
+        """
+        day_index = []
+        rows = []
+        for i, daily_plan in enumerate(meal_plan):
+            for meal_dishes in daily_plan["meals"].values():
+                for item in meal_dishes:
+                    day_index.append(i)
+                    rows.append(self.dish_index[item["菜品ID"]])
+        day_index = np.array(day_index, dtype=np.int64)
+        rows = np.array(rows, dtype=np.int64)
+        nutrition = np.zeros((len(meal_plan), len(self.nutrients)))
+        np.add.at(nutrition, day_index, self.nutrition[rows])
+        price = np.bincount(
+            day_index, weights=self.price[rows], minlength=len(meal_plan)
+        )
+        return nutrition, price
+
+    def report(self, meal_plan, sys_config, average_nutrition=None, average_price=None):
+        """
+        构建多天方案的数值报告（见 PlanReport）
+
+        Args:
+            meal_plan: 每日方案列表
+            sys_config: 系统配置
+            average_nutrition / average_price: 平均每日营养（按 self.nutrients 顺序）和价格，
+                默认为 meal_plan 各天的平均值
+
+        Returns:
+            PlanReport
+        """
+        nutrition, price = self.plan_totals(meal_plan)
+        if average_nutrition is None:
+            average_nutrition = (
+                nutrition.mean(axis=0) if len(meal_plan) else nutrition.sum(axis=0)
+            )
+        if average_price is None:
+            average_price = float(price.mean()) if len(meal_plan) else 0.0
+        return PlanReport.build(
+            self.nutrients,
+            self.nutrition_std_dict,
+            sys_config,
+            [daily_plan["day"] for daily_plan in meal_plan],
+            nutrition,
+            price,
+            average_nutrition,
+            average_price,
+        )
 
-                    # 综合营养和价格得分，动态调整权重比例（随着天数推进，整体得分的权重逐渐增加）
-                    if sys_config["配餐天数"] <= 0:
-                        raise ValueError(
-                            "配餐天数异常：配餐天数应为正数，请检查配餐天数设置！"
-                        )
-                    strategy = int(sys_config.get("整体权重调整策略", 0))
-                    if strategy == 0:
-                        total_weight = min(
-                            day / sys_config["配餐天数"], sys_config["整体权重上限"]
-                        )
-                    elif strategy == 1:
-                        total_weight = sys_config["整体权重上限"] * (
-                            1 - math.exp(-day / sys_config["配餐天数"])
-                        )
-                    else:
-                        raise ValueError(
-                            f"未知的整体权重调整策略。当前策略序号：{strategy}，推荐策略序号：0（线性）或1（指数）"
-                        )
+    def _iter_days(self, state, sys_config, score_mode, profiler=None):
+        """
+        从 state.day 起逐天生成方案并推进排餐进度，逐个产出每日方案
 
-                    nutri_score = (1 - total_weight) * (
-                        nutri_score_day * 0.5 + nutri_score_meal * 0.5
-                    ) + total_weight * nutri_score_total
-                    price_score = (
-                        1 - total_weight
-                    ) * price_score_day + total_weight * price_score_total
-
-                    # 如果菜品是主食，不使用多样性保障机制
-                    if dish["菜品类别"] == "主":
-                        return (
-                            sys_config["营养权重"] * nutri_score
-                            + (1 - sys_config["营养权重"]) * price_score
-                        )
+        profiler 不为 None 时记录各阶段耗时、候选池大小和每天耗时（见 PlannerProfiler）。
+        """
+        if score_mode not in ("vector", "scalar"):
+            raise ValueError(
+                f"未知的评分模式：{score_mode}，可选模式：vector（向量化）或 scalar（逐菜品）"
+            )
 
-                    # 多样性保障机制
-                    dish_id = dish["菜品ID"]
-                    diversity_score = 0.0
+        # 由快照重建菜品最后使用日期数组及可用性索引
+        last_used_arr = np.full(len(self.catalog), NEVER_USED, dtype=np.int64)
+        availability = AvailabilityIndex(
+            [slot[3] for slot in self.slots],
+            self.memberships,
+            sys_config["菜品最小重复天数"],
+        )
+        for dish_id, last_day in sorted(state.last_used.items(), key=lambda x: x[1]):
+            last_used_arr[self.dish_index[dish_id]] = last_day
+            availability.take(self.dish_index[dish_id], last_day)
+
+        # 求解方式：greedy（逐槽位贪心抽样，默认）、beam（当日各槽位集束搜索）
+        # 或 milp（按天/按块精确求解，失败时回退贪心）
+        solver = sys_config.get("solver", "greedy")
+        if solver not in SOLVERS:
+            raise ValueError(
+                f"未知的求解方式：{solver}，可选方式：{'、'.join(SOLVERS)}"
+            )
 
-                    # 1. 使用频率惩罚（过去3天内每使用一次减0.1分）
-                    recent_use = sum(
-                        1
-                        for d in range(day - 3, day)
-                        if last_used.get(dish_id, -1) == d
+        day = state.day
+        while day < sys_config["配餐天数"]:
+            if profiler is not None:
+                profiler.start_day()
+            n_days = 1
+            block_picks = None
+            if solver == "milp":
+                n_days = min(
+                    int(sys_config.get("milp_block_days", 1)),
+                    sys_config["配餐天数"] - day,
+                )
+                block_picks = solve_days(self, day, n_days, last_used_arr, sys_config)
+                if block_picks is None:
+                    state.warnings.add(
+                        f"提示：Day {day + 1}~{day + n_days} 精确求解未在时限内得到达标的解，已回退为贪心算法",
+                        code="milp_fallback",
+                        day=day + 1,
                     )
-                    diversity_score -= 0.1 * recent_use
-
-                    # 2. 使用间隔奖励（超过7天未使用/从未使用的菜品加0.2分）
-                    if dish_id not in last_used or (day - last_used[dish_id]) > 7:
-                        diversity_score += 0.2
-
-                    return (1 - sys_config["多样性权重"]) * (
-                        sys_config["营养权重"] * nutri_score
-                        + (1 - sys_config["营养权重"]) * price_score
-                    ) + sys_config["多样性权重"] * diversity_score
-
-                # 对候选菜品进行评分排序
-                scored = sorted(
-                    [
-                        (
-                            compute_score(
-                                dish,
-                                meal_time,
-                                current_day_nutrition,
-                                meal_nutrition_std_dict,
-                                total_nutrition,
-                                total_price,
-                            ),
-                            dish,
-                        )
-                        for dish in available
-                    ],
-                    key=lambda x: -x[0],
+            elif solver == "beam":
+                availability.release(day)
+                block_picks = [
+                    search_day(
+                        self,
+                        day,
+                        last_used_arr,
+                        availability,
+                        state.total_nutrition,
+                        state.total_price,
+                        sys_config,
+                    )
+                ]
+            if profiler is not None and solver != "greedy":
+                profiler.lap("solver")
+            for offset in range(n_days):
+                if profiler is not None and offset:
+                    profiler.start_day()
+                daily_plan = self._plan_day(
+                    state,
+                    day + offset,
+                    last_used_arr,
+                    availability,
+                    sys_config,
+                    score_mode,
+                    picks=None if block_picks is None else block_picks[offset],
+                    profiler=profiler,
                 )
+                if profiler is not None:
+                    profiler.end_day(day + offset)
+                yield daily_plan
+            day += n_days
+
+    def _plan_day(
+        self,
+        state,
+        day,
+        last_used_arr,
+        availability,
+        sys_config,
+        score_mode,
+        picks=None,
+        profiler=None,
+    ):
+        """
+        生成第 day 天（从0开始）的方案，更新整体累计并推进排餐进度，返回当天方案
+
+        picks 不为 None 时不再评分抽样，直接采用其给出的每个槽位的菜品（候选池行号列表）。
+        profiler 不为 None 时按阶段分段计时（分段起点由调用方设置）。
+        """
+        total_dishes_per_day = self.total_dishes_per_day
+        top_k = sys_config.get("top_k", 3)  # 默认取前3名
+        temperature = sys_config.get("temperature", 0.3)  # 值越小越倾向高分
 
-                # 引入带权重的随机选择（在top_k中按分数权重随机选）
-                top_k = min(sys_config.get("top_k", 3), len(scored))  # 默认取前3名
-                candidates = scored[:top_k]
-
-                # 使用softmax计算选择概率（带温度系数控制随机性强度）
-                scores = np.array([s[0] for s in candidates])
-                temperature = sys_config.get("temperature", 0.3)  # 值越小越倾向高分
-                exp_scores = np.exp((scores - np.max(scores)) / temperature)
-                probs = exp_scores / exp_scores.sum()
-
-                # 随机选择required_count个（无重复）
-                selected_indices = np.random.choice(
-                    len(candidates), size=required_count, replace=False, p=probs
-                )
-                selected = [candidates[i][1] for i in selected_indices]
-
-                # 更新每日状态
-                for dish in selected:
-                    dish_id = dish["菜品ID"]
-                    selected_dishes.add(dish_id)
-                    last_used[dish_id] = day
-                    current_day_price += dish["最终定价"]
-                    current_day_nutrition["能量(Kcal)"] += dish["能量(Kcal)"]
-                    current_day_nutrition["蛋白质(g)"] += dish["蛋白质(g)"]
-                    current_day_nutrition["脂肪(g)"] += dish["脂肪(g)"]
-                    current_day_nutrition["碳水化合物(g)"] += dish["碳水化合物(g)"]
-                    daily_plan["meals"][meal_time].append(
-                        {
-                            "菜品ID": dish_id,
-                            "菜品类别": dish["菜品类别"],
-                            "最终定价": dish["最终定价"],
-                        }
+        daily_plan = {"day": day + 1, "meals": defaultdict(list)}
+        selected_dishes = set()
+        nutrients = self.nutrients
+        current_day_nutrition = np.zeros(len(nutrients))  # 存储每日总营养
+        current_meal_nutrition = defaultdict(
+            lambda: np.zeros(len(nutrients))
+        )  # 存储每餐营养
+        total_nutrition = np.array([state.total_nutrition[n] for n in nutrients])
+        current_day_price = 0.0
+        availability.release(day)
+        if profiler is not None:
+            profiler.lap("availability")
+
+        # 按槽位表顺序处理每个 (餐时段, 类别) 需求
+        for slot, (meal_time, category, required_count, pool) in enumerate(self.slots):
+            if picks is not None:
+                # 使用求解器给出的菜品（pool 中的行号）
+                selected = picks[slot]
+            else:
+                if score_mode == "vector":
+                    # 可用菜品：未被选中且满足重复天数限制，主食不受此限制
+                    if category == "主":
+                        rows = np.arange(len(pool))
+                    else:
+                        rows = availability.rows(slot)
+                    if profiler is not None:
+                        profiler.lap("availability")
+                        profiler.pool(slot, meal_time, category, len(pool), len(rows))
+                    scores, candidates = self._score_slot_vector(
+                        pool,
+                        rows,
+                        meal_time,
+                        category,
+                        required_count,
+                        day,
+                        last_used_arr,
+                        current_meal_nutrition[meal_time],
+                        current_day_nutrition,
+                        total_nutrition,
+                        current_day_price,
+                        state.total_price,
+                        total_dishes_per_day - len(selected_dishes),
+                        max(top_k, required_count),
+                        sys_config,
                     )
-
-        # 更新整体营养和价格
-        total_price += current_day_price
-        for nutrient in current_day_nutrition:
-            total_nutrition[nutrient] += current_day_nutrition[nutrient]
-
-        # 营养偏差检查
-        daily_nutrition_comparison = {}  # 初始化每日营养对比字典
-        for nutrient in nutrition_std_dict:
-            if nutrition_std_dict[nutrient] <= 0:
-                daily_nutrition_comparison[nutrient] = (
-                    f"{current_day_nutrition[nutrient]:.1f}/0.0 ⚠️"  # 处理标准值<=0的情况
-                )
-                continue
-            ratio = current_day_nutrition[nutrient] / nutrition_std_dict[nutrient]
-            deviation = sys_config["营养素偏差比例"].get(nutrient, 0)
-            min_ratio = 1 - deviation
-            max_ratio = 1 + deviation
-            status_symbol = "✅"  # 默认状态符号
-            if not (min_ratio <= ratio <= max_ratio):
-                status_symbol = "❌"  # 超出范围则修改状态符号
-                sign = (
-                    "+"
-                    if current_day_nutrition[nutrient] > nutrition_std_dict[nutrient]
-                    else "-"
-                )
-                warnings.add(
-                    f"警告 [{sign}]：Day {day + 1} {nutrient} 不在允许范围内 [±{sys_config['营养素偏差比例'][nutrient] * 100:.1f}%] （当前值/标准值：{current_day_nutrition[nutrient]:.1f}/{nutrition_std_dict[nutrient]:.1f}）"
+                else:
+                    scored = self._score_slot_scalar(
+                        pool,
+                        meal_time,
+                        category,
+                        required_count,
+                        day,
+                        state.last_used,
+                        selected_dishes,
+                        dict(zip(nutrients, current_meal_nutrition[meal_time])),
+                        dict(zip(nutrients, current_day_nutrition)),
+                        dict(zip(nutrients, total_nutrition)),
+                        current_day_price,
+                        state.total_price,
+                        total_dishes_per_day - len(selected_dishes),
+                        sys_config,
+                    )[: max(top_k, required_count)]
+                    scores = np.array([s[0] for s in scored])
+                    candidates = np.array([s[1] for s in scored], dtype=np.int64)
+                if profiler is not None:
+                    profiler.lap("scoring")
+
+                # 引入带权重的随机选择（在top_k中按softmax(得分/温度)权重无放回抽取required_count个）
+                selected = candidates[
+                    gumbel_top_k(scores, required_count, temperature, state.rng)
+                ]
+                if profiler is not None:
+                    profiler.lap("sampling")
+
+            # 更新每日状态
+            for g in pool.gidx[selected].tolist():
+                dish_id = self.catalog.ids[g]
+                selected_dishes.add(dish_id)
+                state.last_used[dish_id] = day
+                last_used_arr[g] = day
+                availability.take(g, day)
+                current_day_price += self.price[g].item()
+                current_day_nutrition += self.nutrition[g]
+                daily_plan["meals"][meal_time].append(
+                    {
+                        "菜品ID": dish_id,
+                        "菜品类别": category,
+                        "最终定价": self.price[g].item(),
+                    }
                 )
-            # <--- 新增: 添加营养对比字符串到字典
-            daily_nutrition_comparison[nutrient] = (
-                f"{status_symbol} {current_day_nutrition[nutrient]:.1f}/{nutrition_std_dict[nutrient]:.1f} [±{sys_config['营养素偏差比例'][nutrient] * 100:.1f}%]"
-            )
+            if profiler is not None:
+                profiler.lap("update")
 
-        # 价格浮动检查
-        daily_price_comparison_str = ""  # <--- 新增: 初始化每日价格对比字符串
-        if sys_config["每日餐标(元)"] <= 0:
-            raise ValueError("每日餐标异常：每日餐标应为正数，请检查每日餐标设置！")
-        price_ratio = current_day_price / sys_config["每日餐标(元)"]
-        price_deviation = sys_config["餐标浮动比例"]
-        price_status_symbol = "✅"
-        if not (1 - price_deviation <= price_ratio <= 1 + price_deviation):
-            price_status_symbol = "❌"
-            sign = "+" if current_day_price > sys_config["每日餐标(元)"] else "-"
-            warnings.add(
-                f"警告 [{sign}]：Day {day + 1} 价格 不在允许范围内 [±{sys_config['餐标浮动比例'] * 100:.1f}%] （当前值/标准值：{current_day_price:.1f}/{sys_config['每日餐标(元)']:.1f}）"
+        # 更新整体营养和价格
+        state.total_price += current_day_price
+        for nutrient, value in zip(nutrients, current_day_nutrition.tolist()):
+            state.total_nutrition[nutrient] += value
+        if profiler is not None:
+            profiler.lap("update")
+        state.day = day + 1
+        # 只保留滚动窗口内的菜品使用记录
+        state.prune(state.day, usage_window(sys_config))
+        return daily_plan
+
+    def _summarize(self, state, sys_config, profiler=None):
+        """
+        构建数值报告（见 PlanReport），生成排餐方案结果字典
+
+        对比字符串不在此生成，需要时由 render_plan 按需生成。
+        profiler 不为 None 时将距上一个分段点的耗时记入达标检查阶段，并附加 timings 字段。
+        """
+        report = self.report(
+            state.meal_plan,
+            sys_config,
+            average_nutrition=[
+                state.total_nutrition.get(n, 0.0) / sys_config["配餐天数"]
+                for n in self.nutrients
+            ],
+            average_price=state.total_price / sys_config["配餐天数"],
+        )
+        result = {
+            "meal_plan": state.meal_plan,
+            "seed": state.seed,
+            "nutrition_std_dict": dict(self.nutrition_std_dict),
+            "warnings": state.warnings.get_warnings(),
+            "warning_details": state.warnings.to_dict(),
+            "report": report.to_dict(),
+        }
+        if profiler is not None:
+            profiler.lap("compliance")
+            result["timings"] = profiler.summary()
+        return result
+
+    def _score_slot_vector(
+        self,
+        pool,
+        rows,
+        meal_time,
+        category,
+        required_count,
+        day,
+        last_used_arr,
+        current_meal_nutrition,
+        current_day_nutrition,
+        total_nutrition,
+        current_day_price,
+        total_price,
+        remaining_dishes,
+        top_k,
+        sys_config,
+    ):
+        """向量化评分一个槽位的可用菜品（rows），返回按得分降序排列的 top_k 个菜品的 (得分数组, 池内行号数组)"""
+        if len(rows) < required_count:
+            raise ValueError(
+                f"Day {day + 1}, {meal_time}, {category}：可用菜品不足，请减少配餐天数和菜品数量！"
             )
 
-        # <--- 新增: 构建价格对比字符串
-        daily_price_comparison_str = f"{price_status_symbol} {current_day_price:.1f}/{sys_config['每日餐标(元)']:.1f} [±{sys_config['餐标浮动比例'] * 100:.1f}%]"
-
-        # <--- 新增: 将对比信息添加到 daily_plan
-        daily_plan["价格(当前值/标准值)"] = daily_price_comparison_str
-        daily_plan["营养(当前值/标准值)"] = daily_nutrition_comparison
-
-        meal_plan.append(daily_plan)
-
-    # --- 新增: 计算平均每日指标对比 ---
-    avg_daily_price = total_price / sys_config["配餐天数"]
-    avg_daily_nutrition = {
-        k: v / sys_config["配餐天数"] for k, v in total_nutrition.items()
-    }
-    # 计算平均每日价格对比字符串
-    avg_price_comparison_str = ""
-    if sys_config["每日餐标(元)"] > 0:
-        avg_price_ratio = avg_daily_price / sys_config["每日餐标(元)"]
-        price_deviation = sys_config["餐标浮动比例"]
-        avg_price_status_symbol = "✅"
-        if not (1 - price_deviation <= avg_price_ratio <= 1 + price_deviation):
-            avg_price_status_symbol = "❌"
-        avg_price_comparison_str = f"{avg_price_status_symbol} {avg_daily_price:.1f}/{sys_config['每日餐标(元)']:.1f} [±{price_deviation * 100:.1f}%]"
-    else:
-        avg_price_comparison_str = (
-            f"⚠️ {avg_daily_price:.1f}/0.0 [餐标配置错误]"  # 处理餐标<=0的情况
+        scores = compute_scores(
+            pool,
+            rows,
+            day,
+            last_used_arr[pool.gidx[rows]],
+            current_meal_nutrition,
+            current_day_nutrition,
+            total_nutrition,
+            current_day_price,
+            total_price,
+            remaining_dishes,
+            compute_total_weight(day, sys_config),
+            category == "主",
+            sys_config,
         )
 
-    # 计算平均每日营养对比字典
-    avg_nutrition_comparison = {}
-    for nutrient, avg_value in avg_daily_nutrition.items():
-        std_value = nutrition_std_dict.get(nutrient, 0)  # 使用 .get() 避免KeyError
-        if std_value <= 0:
-            avg_nutrition_comparison[nutrient] = (
-                f"⚠️ {avg_value:.1f}/0.0 [营养标准值配置错误]"  # 处理标准值<=0的情况
+        order = top_k_indices(scores, top_k)
+        return scores[order], rows[order]
+
+    def _score_slot_scalar(
+        self,
+        pool,
+        meal_time,
+        category,
+        required_count,
+        day,
+        last_used,
+        selected_dishes,
+        current_meal_nutrition,
+        current_day_nutrition,
+        total_nutrition,
+        current_day_price,
+        total_price,
+        remaining_dishes,
+        sys_config,
+    ):
+        """逐菜品筛选并评分一个槽位的候选菜品，返回按得分降序排列的全部 (得分, 池内行号)"""
+        # 筛选可用菜品：未被选中且满足重复天数限制，主食不受此限制
+        available = []
+
+        if category == "主":
+            available = list(range(len(pool)))
+        else:
+            for row, g in enumerate(pool.gidx.tolist()):
+                dish_id = self.catalog.ids[g]
+                if dish_id in selected_dishes:
+                    continue
+                last_day = last_used.get(dish_id, -sys_config["菜品最小重复天数"] - 1)
+                if (day - last_day) >= sys_config["菜品最小重复天数"]:
+                    available.append(row)
+
+        if len(available) < required_count:
+            raise ValueError(
+                f"Day {day + 1}, {meal_time}, {category}：可用菜品不足，请减少配餐天数和菜品数量！"
             )
-            continue
-        avg_ratio = avg_value / std_value
-        deviation = sys_config["营养素偏差比例"].get(nutrient, 0)
-        min_ratio = 1 - deviation
-        max_ratio = 1 + deviation
-        avg_status_symbol = "✅"
-        if not (min_ratio <= avg_ratio <= max_ratio):
-            avg_status_symbol = "❌"
-        avg_nutrition_comparison[nutrient] = (
-            f"{avg_status_symbol} {avg_value:.1f}/{std_value:.1f} [±{deviation * 100:.1f}%]"
+
+        # 对候选菜品进行评分排序
+        return sorted(
+            [
+                (
+                    compute_score(
+                        self.dish(pool.gidx[row]),
+                        day,
+                        self.meal_nutrition_std_dict[meal_time],
+                        self.nutrition_std_dict,
+                        current_meal_nutrition,
+                        current_day_nutrition,
+                        total_nutrition,
+                        current_day_price,
+                        total_price,
+                        remaining_dishes,
+                        last_used,
+                        sys_config,
+                        self.nutrients,
+                    ),
+                    row,
+                )
+                for row in available
+            ],
+            key=lambda x: -x[0],
         )
-    # --- 结束: 计算平均每日指标对比 ---
 
-    return {
-        "meal_plan": meal_plan,
-        "nutrition_std_dict": nutrition_std_dict,
-        "warnings": warnings.get_warnings(),
-        "avg_daily_price": avg_price_comparison_str,
-        "avg_daily_nutrition": avg_nutrition_comparison,
-    }
+
+def generate_meal_plan(
+    dishes,
+    meal_config,
+    nutrition_std,
+    sys_config,
+    meal_nutrition_std,
+    score_mode="vector",
+    seed=None,
+    profile=None,
+):
+    profiler = make_profiler(profile)
+    if profiler is not None:
+        profiler.mark()
+    model = PlannerModel(dishes, meal_config, nutrition_std, meal_nutrition_std)
+    if profiler is not None:
+        profiler.lap("preprocess")
+    return model.plan(sys_config, seed=seed, score_mode=score_mode, profile=profiler)
+
+
+def iter_meal_plan(
+    dishes,
+    meal_config,
+    nutrition_std,
+    sys_config,
+    meal_nutrition_std,
+    score_mode="vector",
+    seed=None,
+    profile=None,
+):
+    """逐天产出排餐方案，见 PlannerModel.iter_plan"""
+    profiler = make_profiler(profile)
+    if profiler is not None:
+        profiler.mark()
+    model = PlannerModel(dishes, meal_config, nutrition_std, meal_nutrition_std)
+    if profiler is not None:
+        profiler.lap("preprocess")
+    yield from model.iter_plan(
+        sys_config, seed=seed, score_mode=score_mode, profile=profiler
+    )
 
 
 if __name__ == "__main__":
@@ -428,5 +825,4 @@ if __name__ == "__main__":
         dishes, meal_config, nutrition_std, sys_config, meal_nutrition_std
     )
 
-    print(json.dumps(result, indent=2, ensure_ascii=False))
-    warnings.print_all()
+    print(json.dumps(render_plan(result), indent=2, ensure_ascii=False))
@@ -0,0 +1,133 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .meal_planner import PlannerModel
+from .meal_planner import describe_seed, make_seed_sequence
+from .compliance import evaluate_plan, compliance_key
+
+# 工作进程内编译好的排餐模型（由进程池初始化函数构建，每个进程只构建一次）
+_worker_model = None
+
+
+def _init_worker(dishes, meal_config, nutrition_std, meal_nutrition_std):
+    global _worker_model
+    _worker_model = PlannerModel(dishes, meal_config, nutrition_std, meal_nutrition_std)
+
+
+def _run_candidate(model, sys_config, seed, score_mode):
+    """生成并评估一个候选方案，返回 (种子描述, 方案, 评估结果, 耗时, 错误信息)"""
+    start = time.perf_counter()
+    try:
+        result = model.plan(sys_config, seed=seed, score_mode=score_mode)
+    except ValueError as e:
+        return describe_seed(seed), None, None, time.perf_counter() - start, str(e)
+    compliance = evaluate_plan(model, result, sys_config)
+    return result["seed"], result, compliance, time.perf_counter() - start, None
+
+
+def _run_candidate_in_worker(sys_config, seed, score_mode):
+    return _run_candidate(_worker_model, sys_config, seed, score_mode)
+
+
+def generate_best_plan(
+    dishes,
+    meal_config,
+    nutrition_std,
+    sys_config,
+    meal_nutrition_std,
+    n_candidates=8,
+    workers=None,
+    seed=None,
+    score_mode="vector",
+    executor="process",
+):
+    """
+    以不同随机种子独立生成多个候选方案，返回达标情况最好的方案
+
+    候选方案按 (不达标天数, 总偏差) 排序。workers > 1 时候选方案在进程池中并行生成，
+    每个工作进程只编译一次排餐模型；executor 为 thread 时在线程池中并行生成，
+    各线程共用同一个排餐模型。
+
+    Args:
+        dishes, meal_config, nutrition_std, sys_config, meal_nutrition_std: 同 generate_meal_plan
+        n_candidates: 候选方案数量
+        workers: 并行数，默认为 CPU 核数；为 1 时在当前线程内顺序生成
+        seed: 基础随机种子（见 make_rng），各候选方案使用其 SeedSequence.spawn 派生的独立子流；
+            为 None 时使用随机熵。任一候选方案都可用其回显的种子单独复现
+        score_mode: 评分模式
+        executor: 并行方式，process（进程池）或 thread（线程池）
+
+    Returns:
+        (最优方案结果字典, 运行摘要字典)
+    """
+    if n_candidates <= 0:
+        raise ValueError(f"候选方案数量异常：{n_candidates}（应为正整数）")
+    if executor not in ("process", "thread"):
+        raise ValueError(
+            f"未知的并行方式：{executor}，可选方式：process（进程池）或 thread（线程池）"
+        )
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n_candidates))
+    seed = make_seed_sequence(seed)
+    seeds = seed.spawn(n_candidates)
+
+    start = time.perf_counter()
+    if workers == 1 or executor == "thread":
+        model = PlannerModel(dishes, meal_config, nutrition_std, meal_nutrition_std)
+    if workers == 1:
+        runs = [_run_candidate(model, sys_config, s, score_mode) for s in seeds]
+    elif executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            runs = list(
+                pool.map(
+                    _run_candidate,
+                    [model] * n_candidates,
+                    [sys_config] * n_candidates,
+                    seeds,
+                    [score_mode] * n_candidates,
+                )
+            )
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(dishes, meal_config, nutrition_std, meal_nutrition_std),
+        ) as pool:
+            runs = list(
+                pool.map(
+                    _run_candidate_in_worker,
+                    [sys_config] * n_candidates,
+                    seeds,
+                    [score_mode] * n_candidates,
+                )
+            )
+    elapsed = time.perf_counter() - start
+
+    completed = [run for run in runs if run[1] is not None]
+    if not completed:
+        # 所有候选方案均失败时，抛出第一个错误
+        raise ValueError(runs[0][4])
+    best = min(completed, key=lambda run: compliance_key(run[2]))
+
+    summary = {
+        "n_candidates": n_candidates,
+        "workers": workers,
+        "executor": executor,
+        "elapsed": round(elapsed, 4),
+        "seed": describe_seed(seed),
+        "best_seed": best[0],
+        "best": best[2],
+        "failed": len(runs) - len(completed),
+        "runs": [
+            {
+                "seed": run_seed,
+                "elapsed": round(run_elapsed, 4),
+                "error": error,
+                **(compliance or {}),
+            }
+            for run_seed, _, compliance, run_elapsed, error in runs
+        ],
+    }
+    return best[1], summary
@@ -0,0 +1,176 @@
+import time
+
+# 排餐各阶段：预处理（构建模型）、求解（精确求解/集束搜索）、可用性筛选、评分、抽样、
+# 状态更新、达标检查（构建数值报告）、修复
+PHASES = [
+    "preprocess",
+    "solver",
+    "availability",
+    "scoring",
+    "sampling",
+    "update",
+    "compliance",
+    "repair",
+]
+
+
+class PlannerProfiler:
+    """
+    排餐过程的分阶段计时收集器
+
+    记录各阶段的累计耗时和调用次数、每个槽位的候选池大小及每天的可用菜品数、每天的耗时。
+    阶段计时采用"分段"方式：mark 设置起点，lap(phase) 将距上一个分段点的耗时记入该阶段。
+    同一个收集器可传给多次排餐，统计会累加。
+
+    未传入收集器时排餐代码只做 `is not None` 判断，不调用计时函数。
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback  # 每天结束后调用 callback(每日记录)
+        self.phases = {}  # 阶段 -> [累计耗时(秒), 调用次数]
+        # 槽位序号 -> [餐时段, 类别, 候选池大小, 可用数最小值, 最大值, 合计, 次数]
+        self.slots = {}
+        self.days = []  # 每天耗时（秒）
+        self._mark = None
+        self._day_start = None
+        self._day_phases = None
+
+    def add(self, phase, seconds, calls=1):
+        """将一段耗时记入阶段"""
+        record = self.phases.get(phase)
+        if record is None:
+            self.phases[phase] = [seconds, calls]
+        else:
+            record[0] += seconds
+            record[1] += calls
+
+    def mark(self):
+        """设置分段起点"""
+        self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        """将距上一个分段点的耗时记入阶段，并以当前时刻为新的分段点"""
+        now = time.perf_counter()
+        self.add(phase, now - self._mark)
+        self._mark = now
+
+    def pool(self, slot, meal_time, category, pool_size, available):
+        """记录槽位的候选池大小和本次的可用菜品数"""
+        record = self.slots.get(slot)
+        if record is None:
+            self.slots[slot] = [
+                meal_time,
+                category,
+                pool_size,
+                available,
+                available,
+                available,
+                1,
+            ]
+        else:
+            record[3] = min(record[3], available)
+            record[4] = max(record[4], available)
+            record[5] += available
+            record[6] += 1
+
+    def start_day(self):
+        """开始一天的计时（同时设置分段起点）"""
+        self._day_start = self._mark = time.perf_counter()
+        self._day_phases = {phase: record[0] for phase, record in self.phases.items()}
+
+    def end_day(self, day):
+        """结束第 day 天（从0开始）的计时"""
+        elapsed = time.perf_counter() - self._day_start
+        self.days.append(elapsed)
+        if self.callback is not None:
+            self.callback(
+                {
+                    "day": day + 1,
+                    "ms": round(elapsed * 1000, 3),
+                    "phases": {
+                        phase: round(
+                            (record[0] - self._day_phases.get(phase, 0.0)) * 1000, 3
+                        )
+                        for phase, record in self.phases.items()
+                        if record[0] > self._day_phases.get(phase, 0.0)
+                    },
+                }
+            )
+
+    def summary(self):
+        """
+        汇总为结果中的 timings 字段
+
+        Returns:
+            字典：phases（各阶段耗时毫秒数和调用次数，按 PHASES 顺序）、slots（各槽位候选池大小
+            及可用菜品数的最小/平均/最大值）、days（天数、每天耗时的平均/中位/P95/最大值及逐天耗时）
+        """
+        order = {phase: i for i, phase in enumerate(PHASES)}
+        phases = {
+            phase: {"ms": round(seconds * 1000, 3), "calls": calls}
+            for phase, (seconds, calls) in sorted(
+                self.phases.items(), key=lambda x: order.get(x[0], len(PHASES))
+            )
+        }
+        slots = [
+            {
+                "meal_time": meal_time,
+                "category": category,
+                "pool": pool_size,
+                "available": {
+                    "min": lowest,
+                    "mean": round(total / count, 1),
+                    "max": highest,
+                },
+            }
+            for _, (
+                meal_time,
+                category,
+                pool_size,
+                lowest,
+                highest,
+                total,
+                count,
+            ) in sorted(self.slots.items())
+        ]
+        days = sorted(self.days)
+        return {
+            "phases": phases,
+            "slots": slots,
+            "days": {
+                "count": len(days),
+                "mean_ms": round(sum(days) / len(days) * 1000, 3) if days else None,
+                "p50_ms": round(days[len(days) // 2] * 1000, 3) if days else None,
+                "p95_ms": (
+                    round(days[min(len(days) - 1, int(len(days) * 0.95))] * 1000, 3)
+                    if days
+                    else None
+                ),
+                "max_ms": round(days[-1] * 1000, 3) if days else None,
+                "per_day_ms": [round(seconds * 1000, 3) for seconds in self.days],
+            },
+        }
+
+
+def make_profiler(profile):
+    """
+    将 profile 参数统一转为收集器
+
+    Args:
+        profile: None / False（不计时）、True（新建收集器）、PlannerProfiler，
+            或每天结束后调用的回调函数（新建以其为回调的收集器）
+
+    Returns:
+        PlannerProfiler 或 None
+    """
+    if profile is None or profile is False:
+        return None
+    if profile is True:
+        return PlannerProfiler()
+    if isinstance(profile, PlannerProfiler):
+        return profile
+    if callable(profile):
+        return PlannerProfiler(callback=profile)
+    raise ValueError(
+        f"profile 参数异常：{profile!r}（应为 True、PlannerProfiler 或回调函数）"
+    )
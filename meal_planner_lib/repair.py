@@ -0,0 +1,211 @@
+import time
+from collections import defaultdict
+import numpy as np
+
+
+class _Objective:
+    """超出营养素偏差比例和餐标浮动比例的偏差（范围内为0），按天和按整体平均计算"""
+
+    def __init__(self, model, sys_config, n_days):
+        std = np.array([model.nutrition_std_dict.get(n, 0) for n in model.nutrients])
+        self.active = std > 0  # 标准值<=0的营养素不参与达标检查
+        self.std = np.where(self.active, std, 1.0)
+        self.band = np.array(
+            [sys_config["营养素偏差比例"].get(n, 0) for n in model.nutrients]
+        )
+        self.budget = sys_config["每日餐标(元)"]
+        self.price_band = sys_config["餐标浮动比例"]
+        self.n_days = n_days
+
+    def day(self, nutrition, price):
+        excess = np.abs(nutrition / self.std - 1) - self.band
+        price_excess = abs(price / self.budget - 1) - self.price_band
+        return float(excess[self.active & (excess > 0)].sum()) + max(price_excess, 0)
+
+    def horizon(self, nutrition, price):
+        return self.day(nutrition / self.n_days, price / self.n_days)
+
+
+def repair_plan(model, state, sys_config):
+    """
+    对已生成方案中不达标的天进行局部搜索修复（就地修改 state）
+
+    每一步在一个不达标的天中随机选一道菜，将其替换为同一槽位（餐时段、类别）候选池中的
+    另一道菜，或与另一天同一槽位的菜品互换；移动须满足菜品最小重复天数和同日不重复的限制。
+    只有不增加总超标偏差（各天超出允许范围的偏差之和加整体平均的超出偏差）的移动被接受。
+    每步只按增量更新涉及的一到两天及整体的营养和价格合计，因此每秒可评估数千次移动。
+
+    Args:
+        model: 生成该方案的 PlannerModel
+        state: 已完成全部天数的 PlannerState
+        sys_config: 系统配置（repair_iterations：最大移动次数，默认20000；
+            repair_time_limit：时限，单位秒，默认1）
+
+    Returns:
+        修复统计字典：移动次数、接受次数、耗时，以及修复前后的超标偏差和不达标天数
+    """
+    start = time.perf_counter()
+    max_iterations = int(sys_config.get("repair_iterations", 20000))
+    time_limit = sys_config.get("repair_time_limit", 1.0)
+    cooldown = max(int(sys_config["菜品最小重复天数"]), 1)
+    rng = state.rng
+
+    meal_plan = state.meal_plan
+    n_days = len(meal_plan)
+    objective = _Objective(model, sys_config, n_days)
+    nutrition = model.nutrition
+    price = model.price
+    slot_index = {(slot[0], slot[1]): i for i, slot in enumerate(model.slots)}
+
+    # 菜品位置：[天, 方案中的菜品项, 槽位序号, 菜品全局索引]
+    placements = []
+    by_day = [[] for _ in range(n_days)]
+    by_slot = [[] for _ in model.slots]
+    uses = defaultdict(list)  # 受重复天数限制的菜品 -> 使用的天
+    day_nutrition = np.zeros((n_days, len(model.nutrients)))
+    day_price = np.zeros(n_days)
+    for day, daily_plan in enumerate(meal_plan):
+        for meal_time, meal_dishes in daily_plan["meals"].items():
+            for item in meal_dishes:
+                slot = slot_index[(meal_time, item["菜品类别"])]
+                g = model.dish_index[item["菜品ID"]]
+                by_day[day].append(len(placements))
+                by_slot[slot].append(len(placements))
+                placements.append([day, item, slot, g])
+                day_nutrition[day] += nutrition[g]
+                day_price[day] += price[g]
+                if item["菜品类别"] != "主":
+                    uses[g].append(day)
+
+    day_cost = np.array(
+        [objective.day(day_nutrition[d], day_price[d]) for d in range(n_days)]
+    )
+    total_nutrition = day_nutrition.sum(axis=0)
+    total_price = day_price.sum()
+    horizon_cost = objective.horizon(total_nutrition, total_price)
+    cost_before = day_cost.sum() + horizon_cost
+    violation_days_before = int((day_cost > 0).sum())
+
+    def fits(g, is_staple, slot, day, leaving_day):
+        """菜品 g 能否放入第 day 天（g 在 leaving_day 天的那次使用将被移走）"""
+        if is_staple:
+            # 主食不受重复天数限制，仅在同一槽位内不重复
+            return all(
+                placements[p][3] != g or placements[p][2] != slot for p in by_day[day]
+            )
+        skipped = False
+        for used_day in uses[g]:
+            if used_day == leaving_day and not skipped:
+                skipped = True
+                continue
+            if abs(used_day - day) < cooldown:
+                return False
+        return True
+
+    def assign(p, g):
+        """将位置 p 的菜品换为 g"""
+        placement = placements[p]
+        if placement[1]["菜品类别"] != "主":
+            uses[placement[3]].remove(placement[0])
+            uses[g].append(placement[0])
+        placement[3] = g
+        placement[1]["菜品ID"] = model.catalog.ids[g]
+        placement[1]["最终定价"] = model.price[g].item()
+
+    iterations = accepted = 0
+    while iterations < max_iterations:
+        if iterations % 256 == 0 and time.perf_counter() - start > time_limit:
+            break
+        violated = np.flatnonzero(day_cost > 0)
+        if len(violated):
+            day = int(violated[rng.integers(len(violated))])
+        elif horizon_cost > 0:
+            day = int(rng.integers(n_days))
+        else:
+            break
+        iterations += 1
+
+        p = by_day[day][rng.integers(len(by_day[day]))]
+        _, _, slot, g_old = placements[p]
+        pool = model.slots[slot][3]
+        is_staple = model.slots[slot][1] == "主"
+        if rng.random() < 0.5 and len(by_slot[slot]) > 1:
+            # 与另一天同一槽位的菜品互换
+            q = by_slot[slot][rng.integers(len(by_slot[slot]))]
+            other_day, _, _, g_new = placements[q]
+            if other_day == day or g_new == g_old:
+                continue
+            if is_staple:
+                # 互换后两天各自的主食槽位内仍不重复
+                if not (
+                    fits(g_new, True, slot, day, None)
+                    and fits(g_old, True, slot, other_day, None)
+                ):
+                    continue
+            elif not (
+                fits(g_new, False, slot, day, other_day)
+                and fits(g_old, False, slot, other_day, day)
+            ):
+                continue
+            shift = nutrition[g_new] - nutrition[g_old]
+            price_shift = price[g_new] - price[g_old]
+            new_day_cost = objective.day(
+                day_nutrition[day] + shift, day_price[day] + price_shift
+            )
+            new_other_cost = objective.day(
+                day_nutrition[other_day] - shift, day_price[other_day] - price_shift
+            )
+            delta = new_day_cost + new_other_cost - day_cost[day] - day_cost[other_day]
+            if delta > 0:
+                continue
+            day_nutrition[day] += shift
+            day_price[day] += price_shift
+            day_nutrition[other_day] -= shift
+            day_price[other_day] -= price_shift
+            day_cost[day] = new_day_cost
+            day_cost[other_day] = new_other_cost
+            assign(p, g_new)
+            assign(q, g_old)
+        else:
+            # 替换为同一槽位候选池中的另一道菜
+            g_new = int(pool.gidx[rng.integers(len(pool))])
+            if g_new == g_old or not fits(g_new, is_staple, slot, day, None):
+                continue
+            shift = nutrition[g_new] - nutrition[g_old]
+            price_shift = price[g_new] - price[g_old]
+            new_day_cost = objective.day(
+                day_nutrition[day] + shift, day_price[day] + price_shift
+            )
+            new_horizon_cost = objective.horizon(
+                total_nutrition + shift, total_price + price_shift
+            )
+            delta = new_day_cost + new_horizon_cost - day_cost[day] - horizon_cost
+            if delta > 0:
+                continue
+            day_nutrition[day] += shift
+            day_price[day] += price_shift
+            total_nutrition += shift
+            total_price += price_shift
+            day_cost[day] = new_day_cost
+            horizon_cost = new_horizon_cost
+            assign(p, g_new)
+        accepted += 1
+
+    if accepted:
+        # 由修复后的方案重建整体累计和菜品最后使用日期
+        state.total_price = float(day_price.sum())
+        for i, nutrient in enumerate(model.nutrients):
+            state.total_nutrition[nutrient] = float(day_nutrition[:, i].sum())
+        state.last_used = {}
+        for day, item, _, _ in sorted(placements, key=lambda x: x[0]):
+            state.last_used[item["菜品ID"]] = day
+
+    return {
+        "iterations": iterations,
+        "accepted": accepted,
+        "elapsed": round(time.perf_counter() - start, 4),
+        "deviation_before": round(float(cost_before), 6),
+        "deviation_after": round(float(day_cost.sum() + horizon_cost), 6),
+        "violation_days_before": violation_days_before,
+        "violation_days_after": int((day_cost > 0).sum()),
+    }
@@ -0,0 +1,326 @@
+import numpy as np
+
+from .warning_handler import WarningCollector
+
+
+class PlanReport:
+    """
+    排餐方案的数值报告
+
+    包含每日营养合计（天×营养素矩阵）及其与每日营养标准的比值、是否在允许范围内，每日价格及其与
+    每日餐标的比值、是否在允许范围内，以及平均每日指标。达标检查在构建时对全部天数一次性向量化
+    计算；带 ✅/❌ 的对比字符串和警告信息只在 render_* 中按需生成（如写入多维表格时）。
+
+    标准值<=0的营养素不参与达标检查（checked 为 False，比值为 nan，视为在允许范围内）。
+    to_dict() 为可 JSON 序列化的字典（即排餐结果中的 report 字段），from_dict() 可还原。
+    """
+
+    def __init__(
+        self,
+        nutrients,
+        standard,
+        band,
+        budget,
+        price_band,
+        days,
+        actual,
+        price,
+        average_actual,
+        average_price,
+    ):
+        self.nutrients = list(nutrients)
+        self.standard = np.asarray(standard, dtype=np.float64)  # 每日营养标准
+        self.band = np.asarray(band, dtype=np.float64)  # 营养素偏差比例
+        self.budget = budget  # 每日餐标(元)
+        self.price_band = price_band  # 餐标浮动比例
+        self.days = np.asarray(days, dtype=np.int64)  # 天数（从1开始）
+        self.actual = np.asarray(actual, dtype=np.float64).reshape(
+            len(self.days), len(self.nutrients)
+        )
+        self.price = np.asarray(price, dtype=np.float64)
+        self.average_actual = np.asarray(average_actual, dtype=np.float64)
+        self.average_price = average_price
+
+        if len(self.days) and budget <= 0:
+            raise ValueError("每日餐标异常：每日餐标应为正数，请检查每日餐标设置！")
+
+        self.checked = self.standard > 0
+        self.ratio, self.in_band = self._check(self.actual)
+        self.average_ratio, self.average_in_band = self._check(self.average_actual)
+        if budget > 0:
+            self.price_ratio = self.price / budget
+            self.average_price_ratio = average_price / budget
+        else:
+            self.price_ratio = np.full(len(self.price), np.nan)
+            self.average_price_ratio = np.nan
+        self.price_in_band = (self.price_ratio >= 1 - price_band) & (
+            self.price_ratio <= 1 + price_band
+        )
+        self.average_price_in_band = bool(
+            1 - price_band <= self.average_price_ratio <= 1 + price_band
+        )
+        self.ok = self.in_band.all(axis=1) & self.price_in_band
+
+    def _check(self, actual):
+        """与每日营养标准的比值及是否在允许范围内（最后一维为营养素）"""
+        std = np.where(self.checked, self.standard, 1.0)
+        ratio = np.where(self.checked, actual / std, np.nan)
+        in_band = ~self.checked | ((ratio >= 1 - self.band) & (ratio <= 1 + self.band))
+        return ratio, in_band
+
+    @classmethod
+    def build(
+        cls,
+        nutrients,
+        nutrition_std_dict,
+        sys_config,
+        days,
+        actual,
+        price,
+        average_actual,
+        average_price,
+    ):
+        """按每日营养标准和系统配置构建报告（参数含义见 to_dict）"""
+        return cls(
+            nutrients,
+            [nutrition_std_dict.get(n, 0) for n in nutrients],
+            [sys_config["营养素偏差比例"].get(n, 0) for n in nutrients],
+            sys_config["每日餐标(元)"],
+            sys_config["餐标浮动比例"],
+            days,
+            actual,
+            price,
+            average_actual,
+            average_price,
+        )
+
+    @property
+    def violation_days(self):
+        """不达标天数（营养或价格超出允许范围）"""
+        return int((~self.ok).sum())
+
+    def to_dict(self):
+        """
+        转换为可 JSON 序列化的字典
+
+        Returns:
+            nutrients、standard（每日营养标准）、band（营养素偏差比例）、checked、budget、price_band；
+            days：day（天数）、actual（天×营养素）、ratio、in_band、price、price_ratio、price_in_band、ok；
+            average：平均每日的 actual、ratio、in_band、price、price_ratio、price_in_band；
+            violation_days
+        """
+        return {
+            "nutrients": self.nutrients,
+            "standard": self.standard.tolist(),
+            "band": self.band.tolist(),
+            "checked": self.checked.tolist(),
+            "budget": self.budget,
+            "price_band": self.price_band,
+            "days": {
+                "day": self.days.tolist(),
+                "actual": self.actual.tolist(),
+                "ratio": _nan_to_none(self.ratio),
+                "in_band": self.in_band.tolist(),
+                "price": self.price.tolist(),
+                "price_ratio": _nan_to_none(self.price_ratio),
+                "price_in_band": self.price_in_band.tolist(),
+                "ok": self.ok.tolist(),
+            },
+            "average": {
+                "actual": self.average_actual.tolist(),
+                "ratio": _nan_to_none(self.average_ratio),
+                "in_band": self.average_in_band.tolist(),
+                "price": self.average_price,
+                "price_ratio": _nan_to_none(self.average_price_ratio),
+                "price_in_band": self.average_price_in_band,
+            },
+            "violation_days": self.violation_days,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict() 的结果还原（比值和达标标记重新计算）"""
+        return cls(
+            data["nutrients"],
+            data["standard"],
+            data["band"],
+            data["budget"],
+            data["price_band"],
+            data["days"]["day"],
+            data["days"]["actual"],
+            data["days"]["price"],
+            data["average"]["actual"],
+            data["average"]["price"],
+        )
+
+    def day_dict(self, i):
+        """
+        第 i 行（不是天数）的数值报告，可独立渲染（见 render_day_report）
+
+        Returns:
+            nutrients：{营养素: {actual, standard, band, ratio, in_band}}（标准值<=0的营养素
+            ratio 为 None）；price：{actual, budget, band, ratio, in_band}；ok
+        """
+        return {
+            "nutrients": {
+                nutrient: {
+                    "actual": float(self.actual[i, j]),
+                    "standard": float(self.standard[j]),
+                    "band": float(self.band[j]),
+                    "ratio": _nan_to_none(self.ratio[i, j]),
+                    "in_band": bool(self.in_band[i, j]),
+                }
+                for j, nutrient in enumerate(self.nutrients)
+            },
+            "price": {
+                "actual": float(self.price[i]),
+                "budget": self.budget,
+                "band": self.price_band,
+                "ratio": _nan_to_none(self.price_ratio[i]),
+                "in_band": bool(self.price_in_band[i]),
+            },
+            "ok": bool(self.ok[i]),
+        }
+
+    def render_day(self, i):
+        """
+        第 i 行（不是天数）的对比字符串
+
+        Returns:
+            (价格对比字符串, {营养素: 营养对比字符串})
+        """
+        nutrition = {}
+        for j, nutrient in enumerate(self.nutrients):
+            value = self.actual[i, j]
+            if not self.checked[j]:
+                nutrition[nutrient] = f"{value:.1f}/0.0 ⚠️"  # 处理标准值<=0的情况
+                continue
+            symbol = "✅" if self.in_band[i, j] else "❌"
+            nutrition[nutrient] = (
+                f"{symbol} {value:.1f}/{self.standard[j]:.1f} [±{self.band[j] * 100:.1f}%]"
+            )
+        symbol = "✅" if self.price_in_band[i] else "❌"
+        price = f"{symbol} {self.price[i]:.1f}/{self.budget:.1f} [±{self.price_band * 100:.1f}%]"
+        return price, nutrition
+
+    def render_average(self):
+        """
+        平均每日指标的对比字符串
+
+        Returns:
+            (价格对比字符串, {营养素: 营养对比字符串})
+        """
+        if self.budget > 0:
+            symbol = "✅" if self.average_price_in_band else "❌"
+            price = f"{symbol} {self.average_price:.1f}/{self.budget:.1f} [±{self.price_band * 100:.1f}%]"
+        else:
+            price = (
+                f"⚠️ {self.average_price:.1f}/0.0 [餐标配置错误]"  # 处理餐标<=0的情况
+            )
+
+        nutrition = {}
+        for j, nutrient in enumerate(self.nutrients):
+            value = self.average_actual[j]
+            if not self.checked[j]:
+                nutrition[nutrient] = (
+                    f"⚠️ {value:.1f}/0.0 [营养标准值配置错误]"  # 处理标准值<=0的情况
+                )
+                continue
+            symbol = "✅" if self.average_in_band[j] else "❌"
+            nutrition[nutrient] = (
+                f"{symbol} {value:.1f}/{self.standard[j]:.1f} [±{self.band[j] * 100:.1f}%]"
+            )
+        return price, nutrition
+
+    def render_warnings(self):
+        """超出允许范围的营养和价格警告信息（按天，每天先营养后价格）"""
+        return [message for _, message in self._warning_items()]
+
+    def _warning_items(self):
+        """超出允许范围的警告列表 [(天数, 警告信息)]，顺序同 render_warnings"""
+        messages = []
+        for i in np.flatnonzero(~self.ok).tolist():
+            day = self.days[i]
+            for j in np.flatnonzero(~self.in_band[i]).tolist():
+                value, std = self.actual[i, j], self.standard[j]
+                sign = "+" if value > std else "-"
+                messages.append(
+                    (
+                        day,
+                        f"警告 [{sign}]：Day {day} {self.nutrients[j]} 不在允许范围内 [±{self.band[j] * 100:.1f}%] （当前值/标准值：{value:.1f}/{std:.1f}）",
+                    )
+                )
+            if not self.price_in_band[i]:
+                sign = "+" if self.price[i] > self.budget else "-"
+                messages.append(
+                    (
+                        day,
+                        f"警告 [{sign}]：Day {day} 价格 不在允许范围内 [±{self.price_band * 100:.1f}%] （当前值/标准值：{self.price[i]:.1f}/{self.budget:.1f}）",
+                    )
+                )
+        return messages
+
+
+def _nan_to_none(values):
+    """nan 转为 None（JSON 中为 null）"""
+    if np.ndim(values) == 0:
+        return None if np.isnan(values) else float(values)
+    return [_nan_to_none(v) for v in values]
+
+
+def render_day_report(day_report):
+    """
+    由单天的数值报告（PlanReport.day_dict，即逐天产出的每日方案中的 report 字段）生成对比字符串
+
+    Returns:
+        (价格对比字符串, {营养素: 营养对比字符串})，与 render_plan 中的格式相同
+    """
+    nutrition = {}
+    for nutrient, item in day_report["nutrients"].items():
+        if item["ratio"] is None:
+            nutrition[nutrient] = f"{item['actual']:.1f}/0.0 ⚠️"  # 处理标准值<=0的情况
+            continue
+        symbol = "✅" if item["in_band"] else "❌"
+        nutrition[nutrient] = (
+            f"{symbol} {item['actual']:.1f}/{item['standard']:.1f} [±{item['band'] * 100:.1f}%]"
+        )
+    item = day_report["price"]
+    symbol = "✅" if item["in_band"] else "❌"
+    price = f"{symbol} {item['actual']:.1f}/{item['budget']:.1f} [±{item['band'] * 100:.1f}%]"
+    return price, nutrition
+
+
+def render_plan(result):
+    """
+    为排餐结果生成对比字符串和警告信息（供写入多维表格等展示使用），不修改传入的结果
+
+    Returns:
+        结果字典的副本：每日方案增加 价格(当前值/标准值)、营养(当前值/标准值)，增加
+        avg_daily_price、avg_daily_nutrition；超出允许范围的警告与已有警告一起经 WarningCollector
+        去重并按条数上限保留，更新 warnings 和 warning_details
+    """
+    report = PlanReport.from_dict(result["report"])
+    rendered = dict(result)
+    rendered["meal_plan"] = []
+    for i, daily_plan in enumerate(result.get("meal_plan", [])):
+        price, nutrition = report.render_day(i)
+        daily_plan = dict(daily_plan)
+        daily_plan["价格(当前值/标准值)"] = price
+        daily_plan["营养(当前值/标准值)"] = nutrition
+        rendered["meal_plan"].append(daily_plan)
+    if "meal_plan" not in result:
+        del rendered["meal_plan"]
+    rendered["avg_daily_price"], rendered["avg_daily_nutrition"] = (
+        report.render_average()
+    )
+    if "warning_details" in result:
+        warnings = WarningCollector.from_dict(result["warning_details"])
+    else:
+        warnings = WarningCollector()
+        for message in result.get("warnings", []):
+            warnings.add(message)
+    for day, message in report._warning_items():
+        warnings.add(message, code="out_of_band", day=int(day))
+    rendered["warnings"] = warnings.get_warnings()
+    rendered["warning_details"] = warnings.to_dict()
+    return rendered
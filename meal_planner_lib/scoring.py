@@ -0,0 +1,331 @@
+import math
+import numpy as np
+
+# 从未使用过的菜品在 last_used 数组中的占位值
+NEVER_USED = -(10**9)
+
+# 多样性保障机制的时间窗口：过去 RECENT_USE_DAYS 天内使用过的菜品扣分，
+# 超过 LONG_UNUSED_DAYS 天未使用的菜品加分
+RECENT_USE_DAYS = 3
+LONG_UNUSED_DAYS = 7
+
+
+def usage_window(sys_config):
+    """
+    菜品使用记录的保留天数
+
+    最后使用日期早于 day - usage_window 的菜品，在多样性评分和重复天数限制上与从未使用的菜品
+    完全相同，因此排餐进度只需保留这一滚动窗口内的使用记录。
+    """
+    return max(LONG_UNUSED_DAYS, int(sys_config["菜品最小重复天数"]))
+
+
+def nutrient_weights(nutrients, sys_config):
+    """各营养素在营养得分中的权重（系统配置 营养素权重，未配置的营养素为1）"""
+    weights = sys_config.get("营养素权重", {})
+    return np.array([weights.get(n, 1) for n in nutrients], dtype=np.float64)
+
+
+def _weighted_deviation(offsets, weights):
+    """按权重平均各营养素的偏差绝对值；没有参与评分的营养素时偏差为0"""
+    total = weights.sum()
+    if total <= 0:
+        return np.zeros(len(offsets))
+    return np.abs(offsets) @ weights / total
+
+
+def compute_total_weight(day, sys_config):
+    """
+    计算整体得分的权重（随着天数推进，整体得分的权重逐渐增加）
+
+    Args:
+        day: 当前天数索引（从0开始）
+        sys_config: 系统配置
+
+    Returns:
+        整体得分权重
+    """
+    if sys_config["配餐天数"] <= 0:
+        raise ValueError("配餐天数异常：配餐天数应为正数，请检查配餐天数设置！")
+    strategy = int(sys_config.get("整体权重调整策略", 0))
+    if strategy == 0:
+        return min(day / sys_config["配餐天数"], sys_config["整体权重上限"])
+    elif strategy == 1:
+        return sys_config["整体权重上限"] * (
+            1 - math.exp(-day / sys_config["配餐天数"])
+        )
+    raise ValueError(
+        f"未知的整体权重调整策略。当前策略序号：{strategy}，推荐策略序号：0（线性）或1（指数）"
+    )
+
+
+class CandidatePool:
+    """
+    单个 (餐时段, 菜品类别) 槽位的候选菜品池
+
+    候选池只保存菜品的全局索引，营养和价格按全局索引从排餐模型共用的 菜品×营养素 矩阵和价格向量
+    中读取，不为每个槽位复制。评分时取出候选菜品的营养矩阵，按每餐、每日（及按天数缩放的整体）
+    标准相除，一个槽位内所有候选菜品的得分只需一次数组运算即可得到，营养素数量只影响矩阵宽度。
+    标准值缺失或<=0的营养素只累计、不参与评分。
+    """
+
+    def __init__(self, gidx, nutrition, price, meal_std, day_std, nutrients):
+        # 菜品的全局索引（菜品目录中的行号，也是在全局 last_used 数组中的位置）
+        self.gidx = np.asarray(gidx, dtype=np.int64)
+        # 按全局索引排列的 菜品×营养素 矩阵和价格向量（与排餐模型共用）
+        self.all_nutrition = nutrition
+        self.all_price = price
+
+        meal_std = np.array([meal_std.get(n, 0) for n in nutrients], dtype=np.float64)
+        day_std = np.array([day_std.get(n, 0) for n in nutrients], dtype=np.float64)
+        self.nutrients = nutrients
+        # 参与每餐/每日评分的营养素
+        self.meal_mask = meal_std > 0
+        self.day_mask = day_std > 0
+        self.meal_std = np.where(self.meal_mask, meal_std, 1.0)
+        self.day_std = np.where(self.day_mask, day_std, 1.0)
+
+    def __len__(self):
+        return len(self.gidx)
+
+    def nutrition_of(self, rows):
+        """池内行号为 rows 的菜品的营养向量（rows 为数组时为 菜品×营养素 矩阵），按 float64 返回"""
+        return self.all_nutrition[self.gidx[rows]].astype(np.float64)
+
+    def price_of(self, rows):
+        """池内行号为 rows 的菜品的价格"""
+        return self.all_price[self.gidx[rows]]
+
+
+def compute_scores(
+    pool,
+    rows,
+    day,
+    last_used,
+    current_meal_nutrition,
+    current_day_nutrition,
+    total_nutrition,
+    current_day_price,
+    total_price,
+    remaining_dishes,
+    total_weight,
+    is_staple,
+    sys_config,
+):
+    """
+    向量化计算候选菜品得分，与逐菜品评分公式结果一致
+
+    Args:
+        pool: CandidatePool
+        rows: 参与评分的候选菜品在 pool 中的下标数组
+        day: 当前天数索引（从0开始）
+        last_used: 候选菜品最后使用日期数组（与 rows 对齐，从未使用为 NEVER_USED）
+        current_meal_nutrition / current_day_nutrition / total_nutrition: 按 pool.nutrients 顺序的营养累计向量
+        current_day_price / total_price: 当日及整体已选菜品价格
+        remaining_dishes: 当日剩余待选菜品数
+        total_weight: 整体得分权重
+        is_staple: 是否为主食槽位（主食不使用多样性保障机制）
+        sys_config: 系统配置
+
+    Returns:
+        得分数组（与 rows 对齐）
+    """
+    days = sys_config["配餐天数"]
+    budget = sys_config["每日餐标(元)"]
+
+    # 营养得分：每餐、每日、整体（各营养素偏差按权重平均）
+    weights = nutrient_weights(pool.nutrients, sys_config)
+    meal_weights = weights * pool.meal_mask
+    day_weights = weights * pool.day_mask
+    meal_offset = current_meal_nutrition / pool.meal_std - 1
+    day_offset = current_day_nutrition / pool.day_std - 1
+    total_offset = total_nutrition / (pool.day_std * days) - 1
+    nutrition = pool.nutrition_of(rows)
+    day_ratio = nutrition / pool.day_std
+    nutri_score_meal = 1 - _weighted_deviation(
+        nutrition / pool.meal_std + meal_offset, meal_weights
+    )
+    nutri_score_day = 1 - _weighted_deviation(day_ratio + day_offset, day_weights)
+    nutri_score_total = 1 - _weighted_deviation(
+        day_ratio / days + total_offset, day_weights
+    )
+
+    # 价格得分：动态均价、每日、整体
+    price = pool.price_of(rows)
+    remaining_budget = budget - current_day_price
+    if remaining_budget <= 0:
+        remaining_budget = 0.01
+    dynamic_avg = remaining_budget / remaining_dishes
+    price_score_dynamic = 1 - np.abs(price / dynamic_avg - 1)
+    price_score_day = 1 - np.abs((current_day_price + price) / budget - 1)
+    price_score_day = (price_score_day + price_score_dynamic) / 2
+    price_score_total = 1 - np.abs((total_price + price) / (budget * days) - 1)
+
+    nutri_score = (1 - total_weight) * (
+        nutri_score_day * 0.5 + nutri_score_meal * 0.5
+    ) + total_weight * nutri_score_total
+    price_score = (
+        1 - total_weight
+    ) * price_score_day + total_weight * price_score_total
+    score = sys_config["营养权重"] * nutri_score + (1 - sys_config["营养权重"]) * (
+        price_score
+    )
+    if is_staple:
+        return score
+
+    # 多样性保障机制
+    never = last_used == NEVER_USED
+    # 1. 使用频率惩罚（过去3天内使用过减0.1分；从未使用的菜品按 last_used=-1 计）
+    recent_use = ((last_used >= day - RECENT_USE_DAYS) & (last_used < day)) | (
+        never & (day < RECENT_USE_DAYS)
+    )
+    # 2. 使用间隔奖励（超过7天未使用/从未使用的菜品加0.2分）
+    long_unused = never | (day - last_used > LONG_UNUSED_DAYS)
+    diversity_score = 0.2 * long_unused - 0.1 * recent_use
+
+    return (1 - sys_config["多样性权重"]) * score + sys_config[
+        "多样性权重"
+    ] * diversity_score
+
+
+def compute_score(
+    dish,
+    day,
+    meal_nutrition_std,
+    nutrition_std_dict,
+    current_meal_nutrition,
+    current_day_nutrition,
+    total_nutrition,
+    current_day_price,
+    total_price,
+    remaining_dishes,
+    last_used,
+    sys_config,
+    nutrients,
+):
+    """
+    逐菜品计算得分（参考实现，compute_scores 的结果须与之一致）
+
+    Args:
+        dish: 菜品
+        day: 当前天数索引（从0开始）
+        meal_nutrition_std: 当前餐时段的营养标准 {营养素: 标准值}
+        nutrition_std_dict: 每日营养标准 {营养素: 标准值}
+        current_meal_nutrition / current_day_nutrition / total_nutrition: 营养累计 {营养素: 值}
+        current_day_price / total_price: 当日及整体已选菜品价格
+        remaining_dishes: 当日剩余待选菜品数
+        last_used: 菜品最后使用日期 {菜品ID: 天数索引}
+        sys_config: 系统配置
+        nutrients: 参与累计的营养素列表（标准值缺失或<=0的不参与评分）
+
+    Returns:
+        得分
+    """
+    days = sys_config["配餐天数"]
+
+    # 计算当前餐时段、每日及整体营养得分（各营养素偏差按权重平均）
+    weights = sys_config.get("营养素权重", {})
+    meal_deviation = day_deviation = total_deviation = 0.0
+    meal_weight_sum = day_weight_sum = 0.0
+    for n in nutrients:
+        weight = weights.get(n, 1)
+        value = dish.get(n, 0)
+        if meal_nutrition_std.get(n, 0) > 0:
+            meal_ratio = (current_meal_nutrition[n] + value) / meal_nutrition_std[n]
+            meal_deviation += weight * abs(meal_ratio - 1)
+            meal_weight_sum += weight
+        if nutrition_std_dict.get(n, 0) > 0:
+            day_ratio = (current_day_nutrition[n] + value) / nutrition_std_dict[n]
+            total_ratio = (total_nutrition[n] + value) / (nutrition_std_dict[n] * days)
+            day_deviation += weight * abs(day_ratio - 1)
+            total_deviation += weight * abs(total_ratio - 1)
+            day_weight_sum += weight
+    nutri_score_meal = 1 - (
+        meal_deviation / meal_weight_sum if meal_weight_sum > 0 else 0
+    )
+    nutri_score_day = 1 - (day_deviation / day_weight_sum if day_weight_sum > 0 else 0)
+    nutri_score_total = 1 - (
+        total_deviation / day_weight_sum if day_weight_sum > 0 else 0
+    )
+
+    # 计算每日菜品动态均价得分
+    remaining_budget = sys_config["每日餐标(元)"] - current_day_price
+    # 如果剩余预算不足，则强制设置为0.01元，这样低价菜品在后续配餐中更容易被选中
+    if remaining_budget <= 0:
+        remaining_budget = 0.01
+    dynamic_avg = remaining_budget / remaining_dishes
+    price_score_dynamic = 1 - abs(dish["最终定价"] / dynamic_avg - 1)
+
+    # 计算每日价格得分，并与动态均价得分混合
+    price_ratio_day = (current_day_price + dish["最终定价"]) / sys_config[
+        "每日餐标(元)"
+    ]
+    price_score_day = (1 - abs(price_ratio_day - 1) + price_score_dynamic) / 2
+
+    # 计算整体价格得分
+    price_ratio_total = (total_price + dish["最终定价"]) / (
+        sys_config["每日餐标(元)"] * days
+    )
+    price_score_total = 1 - abs(price_ratio_total - 1)
+
+    # 综合营养和价格得分，动态调整权重比例
+    total_weight = compute_total_weight(day, sys_config)
+    nutri_score = (1 - total_weight) * (
+        nutri_score_day * 0.5 + nutri_score_meal * 0.5
+    ) + total_weight * nutri_score_total
+    price_score = (
+        1 - total_weight
+    ) * price_score_day + total_weight * price_score_total
+    score = sys_config["营养权重"] * nutri_score + (1 - sys_config["营养权重"]) * (
+        price_score
+    )
+
+    # 如果菜品是主食，不使用多样性保障机制
+    if dish["菜品类别"] == "主":
+        return score
+
+    # 多样性保障机制
+    dish_id = dish["菜品ID"]
+    diversity_score = 0.0
+
+    # 1. 使用频率惩罚（过去3天内使用过减0.1分；从未使用的菜品按 last_used=-1 计）
+    if day - RECENT_USE_DAYS <= last_used.get(dish_id, -1) < day:
+        diversity_score -= 0.1
+
+    # 2. 使用间隔奖励（超过7天未使用/从未使用的菜品加0.2分）
+    if dish_id not in last_used or (day - last_used[dish_id]) > LONG_UNUSED_DAYS:
+        diversity_score += 0.2
+
+    return (1 - sys_config["多样性权重"]) * score + sys_config[
+        "多样性权重"
+    ] * diversity_score
+
+
+def top_k_indices(scores, k):
+    """
+    返回得分最高的 k 个下标（按得分降序，同分按下标升序，与稳定排序结果一致）
+
+    先用 np.argpartition 部分选择，只对入选的少量下标排序，无需对全部得分排序。
+    """
+    if len(scores) > k:
+        kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        # 保留所有不低于第 k 名得分的下标，保证同分时的取舍与稳定排序一致
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+
+
+def gumbel_top_k(scores, size, temperature, rng):
+    """
+    按 softmax(scores / temperature) 的权重无放回抽取 size 个下标（Gumbel-top-k）
+
+    对 scores / temperature 加上独立的 Gumbel 噪声后取最大的 size 个，
+    与按该权重逐个无放回抽样的分布相同，只需一次向量化抽样。
+    """
+    if size > len(scores):
+        raise ValueError(f"候选菜品数量不足：需要 {size} 个，仅有 {len(scores)} 个")
+    keys = scores / temperature + rng.gumbel(size=len(scores))
+    if size == len(scores):
+        return np.argsort(-keys)
+    return np.argpartition(-keys, size - 1)[:size]
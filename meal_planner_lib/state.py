@@ -0,0 +1,82 @@
+import copy
+import numpy as np
+from collections import defaultdict
+
+from .warning_handler import WarningCollector
+
+
+class PlannerState:
+    """
+    排餐进度快照
+
+    记录已完成的天数、菜品最后使用日期、整体营养和价格累计、已生成的每日方案、随机数流状态
+    以及本次排餐的警告。
+    每天结束后可通过 to_dict() 序列化保存（结果可直接 JSON 序列化），之后用
+    PlannerModel.resume() 从快照继续生成，用于超时或出错后的断点续排。
+    """
+
+    def __init__(
+        self,
+        seed,
+        rng,
+        day=0,
+        last_used=None,
+        total_nutrition=None,
+        total_price=0.0,
+        meal_plan=None,
+        warnings=None,
+    ):
+        self.seed = seed  # 生成该方案使用的种子描述
+        self.rng = rng  # np.random.Generator
+        self.day = day  # 已完成的天数（即下一天的天数索引）
+        self.last_used = {} if last_used is None else last_used
+        self.total_nutrition = defaultdict(float, total_nutrition or {})
+        self.total_price = total_price
+        self.meal_plan = [] if meal_plan is None else meal_plan
+        self.warnings = WarningCollector() if warnings is None else warnings
+
+    def prune(self, day, window):
+        """
+        移除最后使用日期早于 day - window 的菜品使用记录
+
+        窗口外的使用记录对评分和重复天数限制已无影响（见 usage_window），按窗口修剪后
+        last_used 的大小只与窗口天数和每日菜品数有关，不随已排天数增长。
+        """
+        cutoff = day - window
+        for dish_id in [k for k, v in self.last_used.items() if v < cutoff]:
+            del self.last_used[dish_id]
+
+    def to_dict(self):
+        """序列化为可 JSON 保存的快照"""
+        return {
+            "day": self.day,
+            "seed": copy.deepcopy(self.seed),
+            "rng_state": copy.deepcopy(self.rng.bit_generator.state),
+            "last_used": dict(self.last_used),
+            "total_nutrition": dict(self.total_nutrition),
+            "total_price": self.total_price,
+            "meal_plan": copy.deepcopy(self.meal_plan),
+            "warnings": self.warnings.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict() 快照恢复"""
+        rng_state = data["rng_state"]
+        bit_generator = getattr(np.random, rng_state["bit_generator"])()
+        bit_generator.state = copy.deepcopy(rng_state)
+        meal_plan = []
+        for daily_plan in data["meal_plan"]:
+            daily_plan = copy.deepcopy(daily_plan)
+            daily_plan["meals"] = defaultdict(list, daily_plan["meals"])
+            meal_plan.append(daily_plan)
+        return cls(
+            copy.deepcopy(data["seed"]),
+            np.random.Generator(bit_generator),
+            day=data["day"],
+            last_used=dict(data["last_used"]),
+            total_nutrition=data["total_nutrition"],
+            total_price=data["total_price"],
+            meal_plan=meal_plan,
+            warnings=WarningCollector.from_dict(data.get("warnings", {})),
+        )
@@ -1,13 +1,66 @@
+import copy
+
+# 单次排餐最多保留的警告条数（去重后）
+MAX_WARNINGS = 100
+
+
 class WarningCollector:
-    def __init__(self):
-        self.warnings = []
+    """
+    单次排餐的警告收集器
+
+    每次排餐使用独立的收集器（保存在 PlannerState 中），不同调用、不同线程之间互不影响。
+    每条警告记录为 {"code": 类型, "day": 天数, "message": 警告信息, "count": 出现次数}，
+    相同信息的警告只保留一条并累加次数；去重后超过 max_warnings 条的警告不再保留，只计入 dropped。
+    """
+
+    def __init__(self, max_warnings=MAX_WARNINGS, records=None, dropped=0):
+        self.max_warnings = max_warnings
+        self.records = []
+        self._index = {}  # 警告信息 -> 记录
+        self.dropped = dropped  # 因超出条数上限未保留的警告数
+        for record in records or []:
+            self._append(dict(record))
+
+    def _append(self, record):
+        self.records.append(record)
+        self._index[record["message"]] = record
+
+    def add(self, message, code=None, day=None):
+        record = self._index.get(message)
+        if record is not None:
+            record["count"] += 1
+        elif len(self.records) >= self.max_warnings:
+            self.dropped += 1
+        else:
+            self._append({"code": code, "day": day, "message": message, "count": 1})
 
     def get_warnings(self):
-        return self.warnings
+        """警告信息列表（超出条数上限时末尾附加未保留的警告数）"""
+        messages = [record["message"] for record in self.records]
+        if self.dropped:
+            messages.append(
+                f"提示：另有 {self.dropped} 条警告超出上限（{self.max_warnings} 条）未保留"
+            )
+        return messages
+
+    def to_dict(self):
+        """序列化为可 JSON 保存的字典（即排餐结果中的 warning_details 字段）"""
+        return {
+            "max_warnings": self.max_warnings,
+            "records": copy.deepcopy(self.records),
+            "dropped": self.dropped,
+        }
 
-    def add(self, message):
-        self.warnings.append(message)
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict() 的结果恢复"""
+        return cls(
+            data.get("max_warnings", MAX_WARNINGS),
+            records=data.get("records"),
+            dropped=data.get("dropped", 0),
+        )
 
     def print_all(self):
-        if self.warnings:
-            print("\n".join(self.warnings))
+        warnings = self.get_warnings()
+        if warnings:
+            print("\n".join(warnings))